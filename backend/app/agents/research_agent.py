@@ -1,38 +1,165 @@
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, AsyncIterator
 from langchain.agents import Tool, AgentExecutor, create_react_agent
-from langchain.memory import ConversationBufferMemory
 from langchain.prompts import PromptTemplate
 from langchain_google_genai import ChatGoogleGenerativeAI
-from groq import Groq
+from groq import AsyncGroq, RateLimitError, APITimeoutError
+from aiolimiter import AsyncLimiter
+from tenacity import retry, retry_if_exception_type, wait_exponential_jitter, stop_after_attempt
+from functools import lru_cache
+from collections import deque
+import httpx
 import json
 import asyncio
-from datetime import datetime
+from datetime import datetime, timezone
+
+from app.core.config import settings
+from app.core.llm_cache import llm_cache
+
+# Default model per agent type
+DEFAULT_MODELS = {
+    "gemini": "gemini-pro",
+    "groq": "mixtral-8x7b-32768",
+}
+DEFAULT_TEMPERATURE = 0.7
+
+# Completeness by word count: <100, <300, <500, 500+ (indexed by word_count // 100)
+_COMPLETENESS_LUT = (0.3, 0.6, 0.6, 0.8, 0.8, 0.95)
+
+# Max sections drafted concurrently in one paper_writing_batch task
+MAX_PARALLEL_SECTIONS = 8
+
+# Conversation messages kept per agent (oldest are dropped first)
+MAX_HISTORY_MESSAGES = 20
+
+# Prompt templates. The static instructions come first and the per-request
+# fields last, so repeated calls share a byte-identical prefix that
+# providers can serve from their prompt cache.
+_PROMPTS = {
+    "ideas": (
+        "Generate 5 innovative research ideas for the ML topic given below.\n"
+        "\n"
+        "For each idea, provide:\n"
+        "1. Title\n"
+        "2. Brief description\n"
+        "3. Potential impact\n"
+        "4. Key challenges\n"
+        "\n"
+        "Focus on practical and novel approaches.\n"
+        "\n"
+        "Topic: {topic}"
+    ),
+    "proposal": (
+        "Write a detailed research proposal for the idea given below.\n"
+        "\n"
+        "Include:\n"
+        "1. Abstract\n"
+        "2. Introduction and Motivation\n"
+        "3. Related Work\n"
+        "4. Proposed Methodology\n"
+        "5. Expected Outcomes\n"
+        "6. Timeline\n"
+        "7. Required Resources\n"
+        "\n"
+        "Idea: {idea}"
+    ),
+    "experiment": (
+        "Design a comprehensive ML experiment for testing the hypothesis given below.\n"
+        "\n"
+        "Include:\n"
+        "1. Experimental Setup\n"
+        "2. Datasets to use\n"
+        "3. Baseline models\n"
+        "4. Evaluation metrics\n"
+        "5. Statistical tests\n"
+        "6. Expected results\n"
+        "\n"
+        "Hypothesis: {hypothesis}"
+    ),
+    "paper": (
+        "Write the requested section of a research paper based on the content given below.\n"
+        "\n"
+        "Follow standard academic writing style.\n"
+        "Include proper citations format (use [1], [2], etc. for references).\n"
+        "Be technical and precise.\n"
+        "\n"
+        "Section: {section}\n"
+        "Content: {content}"
+    ),
+    "literature": (
+        "Conduct a literature review on the topic given below.\n"
+        "\n"
+        "Include:\n"
+        "1. Key papers and contributions\n"
+        "2. Evolution of the field\n"
+        "3. Current state-of-the-art\n"
+        "4. Open challenges\n"
+        "5. Future directions\n"
+        "\n"
+        "Topic: {topic}"
+    ),
+}
+
+# Per-provider request rate limits (free-tier requests per minute)
+_LIMITERS = {
+    "gemini": AsyncLimiter(settings.GEMINI_RPM, 60),
+    "groq": AsyncLimiter(settings.GROQ_RPM, 60),
+}
+
+# Transient Groq errors worth retrying. Gemini is left out: langchain-google-genai
+# already retries Google API errors inside ainvoke and that retry can't be turned off
+_RETRYABLE_ERRORS = (
+    RateLimitError,
+    APITimeoutError,
+)
+
+# Shared HTTP/2 connection pool for outbound LLM calls
+_shared_http = httpx.AsyncClient(
+    http2=True,
+    limits=httpx.Limits(max_connections=200, max_keepalive_connections=50),
+    timeout=httpx.Timeout(60.0, connect=5.0)
+)
+
+@lru_cache(maxsize=16)
+def _get_llm(agent_type: str, model: str, temperature: float):
+    """Return a process-wide LLM client, built once per (agent_type, model, temperature)"""
+    if agent_type == "gemini":
+        # The Gemini SDK talks gRPC, which already multiplexes over one HTTP/2 channel
+        return ChatGoogleGenerativeAI(
+            model=model,
+            google_api_key=settings.GOOGLE_API_KEY,
+            temperature=temperature
+        )
+    elif agent_type == "groq":
+        # Retries happen in _llm_request, behind the rate limiter
+        return AsyncGroq(api_key=settings.GROQ_API_KEY, http_client=_shared_http, max_retries=0)
+    else:
+        raise ValueError(f"Unknown agent type: {agent_type}")
+
+async def close_llm_clients():
+    """Close the shared HTTP pool (call on application shutdown)"""
+    _get_llm.cache_clear()
+    await _shared_http.aclose()
 
 class ResearchAgent:
     """ML Research Agent for various research tasks"""
     
+    # task_type -> (prompt template name, required parameter names)
+    _DISPATCH = {
+        "idea_generation": ("ideas", ("topic",)),
+        "proposal_writing": ("proposal", ("idea",)),
+        "experiment_design": ("experiment", ("hypothesis",)),
+        "paper_writing": ("paper", ("section", "content")),
+        "literature_review": ("literature", ("topic",)),
+    }
+    
     def __init__(self, agent_type: str = "gemini", task_type: str = "general"):
         self.agent_type = agent_type
         self.task_type = task_type
-        self.memory = ConversationBufferMemory()
-        self.llm = self._initialize_llm()
+        self.model = DEFAULT_MODELS.get(agent_type)
+        self.temperature = DEFAULT_TEMPERATURE
+        self.memory = deque(maxlen=MAX_HISTORY_MESSAGES)
+        self.llm = _get_llm(agent_type, self.model, self.temperature)
         self.tools = self._create_tools()
-        
-    def _initialize_llm(self):
-        """Initialize LLM based on agent type"""
-        if self.agent_type == "gemini":
-            from app.core.config import settings
-            return ChatGoogleGenerativeAI(
-                model="gemini-pro",
-                google_api_key=settings.GOOGLE_API_KEY,
-                temperature=0.7
-            )
-        elif self.agent_type == "groq":
-            from app.core.config import settings
-            client = Groq(api_key=settings.GROQ_API_KEY)
-            return client  # Groq client wrapper needed
-        else:
-            raise ValueError(f"Unknown agent type: {self.agent_type}")
     
     def _create_tools(self) -> List[Tool]:
         """Create tools for the research agent"""
@@ -77,131 +204,156 @@ class ResearchAgent:
     
     async def _generate_ideas(self, topic: str) -> str:
         """Generate research ideas for a given ML topic"""
-        prompt = f"""
-        Generate 5 innovative research ideas for the following ML topic: {topic}
-        
-        For each idea, provide:
-        1. Title
-        2. Brief description
-        3. Potential impact
-        4. Key challenges
-        
-        Focus on practical and novel approaches.
-        """
-        
-        response = await self._async_llm_call(prompt)
-        return response
+        return await self._async_llm_call(_PROMPTS["ideas"].format_map({"topic": topic}))
     
     async def _write_proposal(self, idea: str) -> str:
         """Write a research proposal for a given idea"""
-        prompt = f"""
-        Write a detailed research proposal for the following idea: {idea}
-        
-        Include:
-        1. Abstract
-        2. Introduction and Motivation
-        3. Related Work
-        4. Proposed Methodology
-        5. Expected Outcomes
-        6. Timeline
-        7. Required Resources
-        """
-        
-        response = await self._async_llm_call(prompt)
-        return response
+        return await self._async_llm_call(_PROMPTS["proposal"].format_map({"idea": idea}))
     
     async def _design_experiment(self, hypothesis: str) -> str:
         """Design an experiment for testing a hypothesis"""
-        prompt = f"""
-        Design a comprehensive ML experiment for testing: {hypothesis}
-        
-        Include:
-        1. Experimental Setup
-        2. Datasets to use
-        3. Baseline models
-        4. Evaluation metrics
-        5. Statistical tests
-        6. Expected results
-        """
-        
-        response = await self._async_llm_call(prompt)
-        return response
+        return await self._async_llm_call(_PROMPTS["experiment"].format_map({"hypothesis": hypothesis}))
     
     async def _write_paper(self, section: str, content: str) -> str:
         """Write a section of a research paper"""
-        prompt = f"""
-        Write the {section} section of a research paper based on: {content}
-        
-        Follow standard academic writing style.
-        Include proper citations format (use [1], [2], etc. for references).
-        Be technical and precise.
-        """
-        
-        response = await self._async_llm_call(prompt)
-        return response
+        return await self._async_llm_call(
+            _PROMPTS["paper"].format_map({"section": section, "content": content})
+        )
     
     async def _literature_review(self, topic: str) -> str:
         """Conduct a literature review on a topic"""
-        prompt = f"""
-        Conduct a literature review on: {topic}
+        return await self._async_llm_call(_PROMPTS["literature"].format_map({"topic": topic}))
+    
+    async def _write_paper_sections(self, sections: List[str], content: str) -> str:
+        """Write several independent paper sections concurrently"""
+        semaphore = asyncio.Semaphore(MAX_PARALLEL_SECTIONS)
+        
+        async def write_one(section: str) -> str:
+            async with semaphore:
+                return await self._write_paper(section, content)
+        
+        outputs = await asyncio.gather(*(write_one(s) for s in sections), return_exceptions=True)
         
-        Include:
-        1. Key papers and contributions
-        2. Evolution of the field
-        3. Current state-of-the-art
-        4. Open challenges
-        5. Future directions
-        """
+        failed = [(s, o) for s, o in zip(sections, outputs) if isinstance(o, Exception)]
+        if failed:
+            raise RuntimeError("; ".join(f"{s}: {e}" for s, e in failed))
         
-        response = await self._async_llm_call(prompt)
-        return response
+        return "\n\n".join(f"## {s}\n\n{o}" for s, o in zip(sections, outputs))
     
     async def _async_llm_call(self, prompt: str) -> str:
         """Async wrapper for LLM calls"""
-        try:
+        cached = await llm_cache.lookup(self.model, prompt, self.temperature)
+        if cached is not None:
+            return cached
+        
+        # Errors propagate so execute_task marks the task as failed
+        output = await self._llm_request(prompt)
+        await llm_cache.store(self.model, prompt, self.temperature, output)
+        self._remember(prompt, output)
+        return output
+    
+    @retry(
+        retry=retry_if_exception_type(_RETRYABLE_ERRORS),
+        wait=wait_exponential_jitter(initial=1, max=30),
+        stop=stop_after_attempt(5),
+        reraise=True
+    )
+    async def _llm_request(self, prompt: str) -> str:
+        """Rate-limited LLM request; Groq rate-limit and timeout errors are retried with backoff"""
+        async with _LIMITERS[self.agent_type]:
             # For Gemini
             if self.agent_type == "gemini":
-                response = self.llm.invoke(prompt)
+                response = await self.llm.ainvoke(prompt)
                 return response.content
             # For Groq
             elif self.agent_type == "groq":
-                # Implement Groq-specific call
-                pass
+                completion = await self.llm.chat.completions.create(
+                    model=self.model,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=self.temperature
+                )
+                return completion.choices[0].message.content
             else:
-                return "Agent type not supported"
-        except Exception as e:
-            return f"Error: {str(e)}"
+                raise ValueError(f"Unknown agent type: {self.agent_type}")
     
-    async def execute_task(self, task: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute a research task"""
-        task_type = task.get("type")
-        parameters = task.get("parameters", {})
+    async def _async_llm_stream(self, prompt: str) -> AsyncIterator[str]:
+        """Async generator yielding LLM output chunks as they arrive"""
+        cached = await llm_cache.lookup(self.model, prompt, self.temperature)
+        if cached is not None:
+            yield cached
+            return
+        
+        await _LIMITERS[self.agent_type].acquire()
+        
+        chunks = []
+        if self.agent_type == "gemini":
+            async for chunk in self.llm.astream(prompt):
+                chunks.append(chunk.content)
+                yield chunk.content
+        elif self.agent_type == "groq":
+            stream = await self.llm.chat.completions.create(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=self.temperature,
+                stream=True
+            )
+            async for chunk in stream:
+                text = chunk.choices[0].delta.content
+                if text:
+                    chunks.append(text)
+                    yield text
+        else:
+            raise ValueError(f"Unknown agent type: {self.agent_type}")
         
+        output = "".join(chunks)
+        await llm_cache.store(self.model, prompt, self.temperature, output)
+        self._remember(prompt, output)
+    
+    def _remember(self, prompt: str, response: str):
+        """Record a completed turn in the bounded history"""
+        self.memory.append({"role": "user", "content": prompt})
+        self.memory.append({"role": "assistant", "content": response})
+    
+    def _build_prompt(self, task_type: str, parameters: Dict[str, Any]) -> str:
+        """Resolve the task type and render its prompt"""
+        if task_type not in self._DISPATCH:
+            raise ValueError(f"Unknown task type: {task_type}")
+        template_name, param_names = self._DISPATCH[task_type]
+        missing = [p for p in param_names if p not in parameters]
+        if missing:
+            raise ValueError(f"Missing parameters for {task_type}: {', '.join(missing)}")
+        
+        return _PROMPTS[template_name].format_map({p: parameters[p] for p in param_names})
+    
+    def build_result(self, task: Dict[str, Any], output: Optional[str] = None) -> Dict[str, Any]:
+        """Build the result record for a task, with metrics when output is given"""
         result = {
             "task_id": task.get("id"),
-            "task_type": task_type,
+            "task_type": task.get("type"),
             "status": "completed",
-            "timestamp": datetime.now().isoformat(),
-            "result": None,
-            "metrics": {}
+            "timestamp": datetime.now(timezone.utc),
+            "result": output,
+            "metrics": self._calculate_metrics(output) if output is not None else {}
         }
+        return result
+    
+    async def execute_task(self, task: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute a research task"""
+        result = self.build_result(task)
         
         try:
-            if task_type == "idea_generation":
-                output = await self._generate_ideas(parameters.get("topic"))
-            elif task_type == "proposal_writing":
-                output = await self._write_proposal(parameters.get("idea"))
-            elif task_type == "experiment_design":
-                output = await self._design_experiment(parameters.get("hypothesis"))
-            elif task_type == "paper_writing":
-                output = await self._write_paper(
-                    parameters.get("section"),
-                    parameters.get("content")
-                )
-            elif task_type == "literature_review":
-                output = await self._literature_review(parameters.get("topic"))
+            parameters = task.get("parameters", {})
+            if task.get("type") == "paper_writing_batch":
+                # Sections are independent, so they are drafted in parallel
+                if "sections" not in parameters or "content" not in parameters:
+                    raise ValueError("Missing parameters for paper_writing_batch: sections, content")
+                sections = parameters["sections"]
+                if not isinstance(sections, list) or not sections or not all(isinstance(s, str) for s in sections):
+                    raise ValueError("sections for paper_writing_batch must be a non-empty list of strings")
+                output = await self._write_paper_sections(sections, parameters["content"])
             else:
-                raise ValueError(f"Unknown task type: {task_type}")
+                prompt = self._build_prompt(task.get("type"), parameters)
+                output = await self._async_llm_call(prompt)
             
             result["result"] = output
             result["metrics"] = self._calculate_metrics(output)
@@ -212,27 +364,26 @@ class ResearchAgent:
         
         return result
     
+    async def stream_task(self, task: Dict[str, Any]) -> AsyncIterator[str]:
+        """Execute a research task, yielding output chunks as they arrive"""
+        prompt = self._build_prompt(task.get("type"), task.get("parameters", {}))
+        async for chunk in self._async_llm_stream(prompt):
+            yield chunk
+    
     def _calculate_metrics(self, output: str) -> Dict[str, Any]:
         """Calculate metrics for the output"""
+        word_count = len(output.split())
         return {
             "output_length": len(output),
-            "word_count": len(output.split()),
-            "completeness": self._assess_completeness(output),
+            "word_count": word_count,
+            "completeness": self._assess_completeness(word_count),
             "quality_score": self._assess_quality(output)
         }
     
-    def _assess_completeness(self, output: str) -> float:
+    def _assess_completeness(self, word_count: int) -> float:
         """Assess completeness of the output (0-1)"""
-        # Simple heuristic based on length
-        word_count = len(output.split())
-        if word_count < 100:
-            return 0.3
-        elif word_count < 300:
-            return 0.6
-        elif word_count < 500:
-            return 0.8
-        else:
-            return 0.95
+        # Simple heuristic based on length, bucketed per 100 words
+        return _COMPLETENESS_LUT[min(word_count // 100, 5)]
     
     def _assess_quality(self, output: str) -> float:
         """Assess quality of the output (0-1)"""
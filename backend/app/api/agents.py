@@ -1,18 +1,97 @@
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Request, Response
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
-from datetime import datetime
+from datetime import datetime, timezone
+from sse_starlette.sse import EventSourceResponse
 import uuid
 import asyncio
+import hashlib
+import json
+import orjson
 
-from app.agents.research_agent import ResearchAgent
+from app.agents.research_agent import ResearchAgent, close_llm_clients
 from app.db.models import User, AgentTest
 from app.api.auth import get_current_user
-from app.db.database import get_db
-from sqlalchemy.orm import Session
+from app.db.write_buffer import write_buffer
+from app.core.task_store import set_task, get_task, append_task_output
 
 router = APIRouter()
 
+# Static catalogue responses, serialized once at import
+_AGENTS_PAYLOAD = orjson.dumps({
+    "agents": [
+        {
+            "id": "gemini",
+            "name": "Google Gemini",
+            "description": "Google's Gemini Pro model for research tasks",
+            "capabilities": ["idea_generation", "proposal_writing", "paper_writing", "literature_review", "experiment_design"]
+        },
+        {
+            "id": "groq",
+            "name": "Groq LPU",
+            "description": "Fast inference with Groq",
+            "capabilities": ["idea_generation", "experiment_design", "literature_review"]
+        }
+    ]
+})
+
+_TASKS_PAYLOAD = orjson.dumps({
+    "tasks": [
+        {
+            "id": "idea_generation",
+            "name": "Idea Generation",
+            "description": "Generate research ideas for ML topics",
+            "category": "ideation"
+        },
+        {
+            "id": "proposal_writing",
+            "name": "Proposal Writing",
+            "description": "Write research proposals",
+            "category": "writing"
+        },
+        {
+            "id": "experiment_design",
+            "name": "Experiment Design",
+            "description": "Design ML experiments",
+            "category": "experimentation"
+        },
+        {
+            "id": "paper_writing",
+            "name": "Paper Writing",
+            "description": "Write research paper sections",
+            "category": "writing"
+        },
+        {
+            "id": "literature_review",
+            "name": "Literature Review",
+            "description": "Conduct literature reviews",
+            "category": "research"
+        }
+    ]
+})
+
+_AGENTS_ETAG = f'"{hashlib.md5(_AGENTS_PAYLOAD).hexdigest()}"'
+_TASKS_ETAG = f'"{hashlib.md5(_TASKS_PAYLOAD).hexdigest()}"'
+
+def _static_json_response(request: Request, payload: bytes, etag: str) -> Response:
+    """Serve a pre-built JSON body, answering 304 when the client's ETag matches"""
+    headers = {"Cache-Control": "public, max-age=3600", "ETag": etag}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=payload, media_type="application/json", headers=headers)
+
+@router.on_event("startup")
+async def start_write_buffer():
+    write_buffer.start()
+
+@router.on_event("shutdown")
+async def stop_write_buffer():
+    await write_buffer.stop()
+
+@router.on_event("shutdown")
+async def close_http_clients():
+    await close_llm_clients()
+
 class AgentTaskRequest(BaseModel):
     agent_type: str  # gemini, groq
     task_type: str  # idea_generation, proposal_writing, etc.
@@ -23,24 +102,20 @@ class AgentTaskResponse(BaseModel):
     status: str
     message: str
 
-# Store for tracking tasks (in production, use Redis)
-task_store = {}
-
 @router.post("/execute-task", response_model=AgentTaskResponse)
 async def execute_agent_task(
     request: AgentTaskRequest,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    background_tasks: BackgroundTasks
 ):
     """Execute an agent task"""
     task_id = str(uuid.uuid4())
     
     # Store task status
-    task_store[task_id] = {
+    await set_task(task_id, {
         "status": "processing",
         "result": None,
         "error": None
-    }
+    })
     
     # Create agent
     agent = ResearchAgent(
@@ -60,8 +135,7 @@ async def execute_agent_task(
         process_agent_task,
         agent,
         task,
-        task_id,
-        db
+        task_id
     )
     
     return AgentTaskResponse(
@@ -70,104 +144,113 @@ async def execute_agent_task(
         message="Task submitted successfully"
     )
 
+async def save_test_record(agent_type: str, task: Dict, result: Dict):
+    """Queue a finished agent task for the next batched insert"""
+    # Save to database (without user_id for now since this is background task)
+    await write_buffer.put(AgentTest(
+        user_id=1,  # Default user for demo
+        agent_type=agent_type,
+        task_type=task["type"],
+        parameters=task["parameters"],
+        result=result,
+        created_at=datetime.now(timezone.utc)
+    ))
+
 async def process_agent_task(
     agent: ResearchAgent,
     task: Dict,
-    task_id: str,
-    db: Session
+    task_id: str
 ):
     """Process agent task in background"""
     try:
         result = await agent.execute_task(task)
         
         # Update task store
-        task_store[task_id] = {
+        await set_task(task_id, {
             "status": "completed",
             "result": result,
             "error": None
-        }
+        })
         
-        # Save to database (without user_id for now since this is background task)
-        test_record = AgentTest(
-            user_id=1,  # Default user for demo
-            agent_type=agent.agent_type,
-            task_type=task["type"],
-            parameters=task["parameters"],
-            result=result,
-            created_at=datetime.utcnow()
-        )
-        db.add(test_record)
-        db.commit()
+        await save_test_record(agent.agent_type, task, result)
         
     except Exception as e:
-        task_store[task_id] = {
+        await set_task(task_id, {
             "status": "failed",
             "result": None,
             "error": str(e)
-        }
+        })
+
+@router.post("/execute-task/stream")
+async def stream_agent_task(
+    request: AgentTaskRequest
+):
+    """Execute an agent task, streaming output as server-sent events"""
+    task_id = str(uuid.uuid4())
+    
+    agent = ResearchAgent(
+        agent_type=request.agent_type,
+        task_type=request.task_type
+    )
+    
+    task = {
+        "id": task_id,
+        "type": request.task_type,
+        "parameters": request.parameters
+    }
+    
+    # Partial output stays visible to /task-status while streaming
+    await set_task(task_id, {
+        "status": "processing",
+        "result": None,
+        "error": None
+    })
+    
+    async def event_generator():
+        yield {"event": "task", "data": json.dumps({"task_id": task_id})}
+        
+        chunks = []
+        try:
+            async for chunk in agent.stream_task(task):
+                chunks.append(chunk)
+                await append_task_output(task_id, chunk)
+                yield {"data": json.dumps({"text": chunk})}
+        except Exception as e:
+            await set_task(task_id, {
+                "status": "failed",
+                "result": None,
+                "error": str(e)
+            })
+            yield {"event": "error", "data": json.dumps({"error": str(e)})}
+            return
+        
+        result = agent.build_result(task, "".join(chunks))
+        await set_task(task_id, {
+            "status": "completed",
+            "result": result,
+            "error": None
+        })
+        await save_test_record(agent.agent_type, task, result)
+        
+        yield {"event": "done", "data": json.dumps({"task_id": task_id, "metrics": result["metrics"]})}
+    
+    return EventSourceResponse(event_generator())
 
 @router.get("/task-status/{task_id}")
 async def get_task_status(task_id: str):
     """Get status of a task"""
-    if task_id not in task_store:
+    state = await get_task(task_id)
+    if state is None:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    return task_store[task_id]
+    return state
 
 @router.get("/available-agents")
-async def get_available_agents():
+async def get_available_agents(request: Request):
     """Get list of available agents"""
-    return {
-        "agents": [
-            {
-                "id": "gemini",
-                "name": "Google Gemini",
-                "description": "Google's Gemini Pro model for research tasks",
-                "capabilities": ["idea_generation", "proposal_writing", "paper_writing", "literature_review", "experiment_design"]
-            },
-            {
-                "id": "groq",
-                "name": "Groq LPU",
-                "description": "Fast inference with Groq",
-                "capabilities": ["idea_generation", "experiment_design", "literature_review"]
-            }
-        ]
-    }
+    return _static_json_response(request, _AGENTS_PAYLOAD, _AGENTS_ETAG)
 
 @router.get("/task-types")
-async def get_task_types():
+async def get_task_types(request: Request):
     """Get available task types"""
-    return {
-        "tasks": [
-            {
-                "id": "idea_generation",
-                "name": "Idea Generation",
-                "description": "Generate research ideas for ML topics",
-                "category": "ideation"
-            },
-            {
-                "id": "proposal_writing",
-                "name": "Proposal Writing",
-                "description": "Write research proposals",
-                "category": "writing"
-            },
-            {
-                "id": "experiment_design",
-                "name": "Experiment Design",
-                "description": "Design ML experiments",
-                "category": "experimentation"
-            },
-            {
-                "id": "paper_writing",
-                "name": "Paper Writing",
-                "description": "Write research paper sections",
-                "category": "writing"
-            },
-            {
-                "id": "literature_review",
-                "name": "Literature Review",
-                "description": "Conduct literature reviews",
-                "category": "research"
-            }
-        ]
-    }
\ No newline at end of file
+    return _static_json_response(request, _TASKS_PAYLOAD, _TASKS_ETAG)
@@ -1,14 +1,24 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
+from fastapi.responses import ORJSONResponse
 from typing import List, Dict, Any, Optional
-from pydantic import BaseModel
-from datetime import datetime
-from sqlalchemy.orm import Session
+from pydantic import BaseModel, ConfigDict
+from datetime import datetime, timezone
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy import select
+import asyncio
+import logging
+import uuid
 
-from app.db.database import get_db
+from app.agents.research_agent import ResearchAgent
+from app.core.config import settings
+from app.db.database import get_db, SessionLocal
 from app.db.models import User, Experiment, AgentTest
 from app.api.auth import get_current_user
 
-router = APIRouter()
+logger = logging.getLogger(__name__)
+
+router = APIRouter(default_response_class=ORJSONResponse)
 
 class ExperimentCreate(BaseModel):
     name: str
@@ -19,6 +29,8 @@ class ExperimentCreate(BaseModel):
     config: Dict[str, Any]
 
 class ExperimentResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    
     id: int
     name: str
     description: str
@@ -31,7 +43,7 @@ class ExperimentResponse(BaseModel):
 async def create_experiment(
     experiment: ExperimentCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new experiment"""
     db_experiment = Experiment(
@@ -43,91 +55,162 @@ async def create_experiment(
         tasks=experiment.tasks,
         config=experiment.config,
         status="created",
-        created_at=datetime.utcnow()
+        created_at=datetime.now(timezone.utc)
     )
     
     db.add(db_experiment)
-    db.commit()
-    db.refresh(db_experiment)
-    
-    return ExperimentResponse(
-        id=db_experiment.id,
-        name=db_experiment.name,
-        description=db_experiment.description,
-        domain=db_experiment.domain,
-        status=db_experiment.status,
-        created_at=db_experiment.created_at,
-        results=None
-    )
+    await db.commit()
+    await db.refresh(db_experiment)
+    
+    return ExperimentResponse.model_validate(db_experiment)
 
 @router.post("/{experiment_id}/run")
 async def run_experiment(
     experiment_id: int,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Run an experiment"""
-    experiment = db.query(Experiment).filter(
+    result = await db.execute(select(Experiment).where(
         Experiment.id == experiment_id,
         Experiment.user_id == current_user.id
-    ).first()
+    ))
+    experiment = result.scalar_one_or_none()
     
     if not experiment:
         raise HTTPException(status_code=404, detail="Experiment not found")
     
     # Update status
     experiment.status = "running"
-    experiment.started_at = datetime.utcnow()
-    db.commit()
+    experiment.started_at = datetime.now(timezone.utc)
+    await db.commit()
     
-    # Here you would trigger the actual experiment execution
-    # This could involve running multiple agent tasks in parallel
+    # Run every agent/task pair in the background
+    background_tasks.add_task(
+        execute_experiment,
+        experiment.id,
+        current_user.id,
+        experiment.agents or [],
+        experiment.tasks or [],
+        (experiment.config or {}).get("parameters", {})
+    )
     
     return {"message": "Experiment started", "experiment_id": experiment_id}
 
+async def execute_experiment(
+    experiment_id: int,
+    user_id: int,
+    agents: List[str],
+    tasks: List[str],
+    parameters: Dict[str, Any]
+):
+    """Run all agent tasks of an experiment concurrently and store the results"""
+    semaphore = asyncio.Semaphore(settings.TOOL_CONCURRENCY_LIMIT)
+    
+    async def run_one(agent_type: str, task_type: str) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                agent = ResearchAgent(agent_type=agent_type, task_type=task_type)
+                return await agent.execute_task({
+                    "id": str(uuid.uuid4()),
+                    "type": task_type,
+                    "parameters": parameters
+                })
+            except Exception as e:
+                # Isolate failures so one bad task doesn't abort the batch
+                return {
+                    "task_id": None,
+                    "task_type": task_type,
+                    "status": "failed",
+                    "timestamp": datetime.now(timezone.utc),
+                    "result": None,
+                    "metrics": {},
+                    "error": str(e)
+                }
+    
+    pairs = [(agent_type, task_type) for agent_type in agents for task_type in tasks]
+    results = await asyncio.gather(*(run_one(a, t) for a, t in pairs))
+    
+    # One timestamp for the whole batch
+    created_at = datetime.now(timezone.utc)
+    records = [
+        AgentTest(
+            user_id=user_id,
+            experiment_id=experiment_id,
+            agent_type=agent_type,
+            task_type=task_type,
+            parameters=parameters,
+            result=result,
+            created_at=created_at
+        )
+        for (agent_type, task_type), result in zip(pairs, results)
+    ]
+    
+    # Background task outlives the request, so it uses its own session
+    try:
+        async with SessionLocal() as db:
+            await db.run_sync(lambda session: session.bulk_save_objects(records))
+            
+            # Loaded with every stored test, earlier runs included, so the summary covers them all
+            result = await db.execute(select(Experiment).options(
+                selectinload(Experiment.agent_tests)
+            ).where(Experiment.id == experiment_id))
+            experiment = result.scalar_one_or_none()
+            if experiment:
+                experiment.status = "completed"
+                experiment.completed_at = datetime.now(timezone.utc)
+                experiment.results = summarize_tests([test.result for test in experiment.agent_tests])
+            await db.commit()
+    except Exception:
+        # The failed session rolls back on close; record the failure in a fresh one
+        logger.exception("Failed to save results of experiment %s", experiment_id)
+        await mark_experiment_failed(experiment_id)
+
+async def mark_experiment_failed(experiment_id: int):
+    """Move an experiment out of "running" after its results could not be saved"""
+    try:
+        async with SessionLocal() as db:
+            experiment = await db.get(Experiment, experiment_id)
+            if experiment:
+                experiment.status = "failed"
+                experiment.completed_at = datetime.now(timezone.utc)
+                await db.commit()
+    except Exception:
+        logger.exception("Failed to mark experiment %s as failed", experiment_id)
+
 @router.get("/list", response_model=List[ExperimentResponse])
 async def list_experiments(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """List user's experiments"""
-    experiments = db.query(Experiment).filter(
+    result = await db.execute(select(Experiment).where(
         Experiment.user_id == current_user.id
-    ).all()
-    
-    return [
-        ExperimentResponse(
-            id=exp.id,
-            name=exp.name,
-            description=exp.description,
-            domain=exp.domain,
-            status=exp.status,
-            created_at=exp.created_at,
-            results=exp.results
-        )
-        for exp in experiments
-    ]
+    ))
+    experiments = result.scalars().all()
+    
+    return [ExperimentResponse.model_validate(exp) for exp in experiments]
 
 @router.get("/{experiment_id}/results")
 async def get_experiment_results(
     experiment_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get experiment results"""
-    experiment = db.query(Experiment).filter(
+    # Load the experiment's agent tests eagerly alongside it
+    result = await db.execute(select(Experiment).options(
+        selectinload(Experiment.agent_tests)
+    ).where(
         Experiment.id == experiment_id,
         Experiment.user_id == current_user.id
-    ).first()
+    ))
+    experiment = result.scalar_one_or_none()
     
     if not experiment:
         raise HTTPException(status_code=404, detail="Experiment not found")
     
-    # Get all agent tests for this experiment
-    tests = db.query(AgentTest).filter(
-        AgentTest.experiment_id == experiment_id
-    ).all()
-    
     results = {
         "experiment": {
             "id": experiment.id,
@@ -142,29 +225,31 @@ async def get_experiment_results(
                 "result": test.result,
                 "created_at": test.created_at
             }
-            for test in tests
+            for test in experiment.agent_tests
         ],
-        "summary": calculate_experiment_summary(tests)
+        # Tests are already loaded, so summarize them here instead of another query
+        "summary": summarize_tests([test.result for test in experiment.agent_tests])
     }
     
-    return results
+    # orjson serializes the datetimes directly, no jsonable_encoder pass
+    return ORJSONResponse(results)
 
-def calculate_experiment_summary(tests):
-    """Calculate summary statistics for experiment"""
-    if not tests:
+def summarize_tests(results: List[Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Calculate summary statistics for an experiment's test results"""
+    if not results:
         return {}
     
-    total_tests = len(tests)
-    successful_tests = sum(1 for t in tests if t.result.get("status") == "completed")
-    
-    avg_quality = sum(
-        t.result.get("metrics", {}).get("quality_score", 0) 
-        for t in tests
-    ) / total_tests if total_tests > 0 else 0
+    success = 0
+    quality_sum = 0.0
+    for result in results:
+        result = result or {}
+        if result.get("status") == "completed":
+            success += 1
+        quality_sum += float((result.get("metrics") or {}).get("quality_score") or 0)
     
     return {
-        "total_tests": total_tests,
-        "successful_tests": successful_tests,
-        "success_rate": successful_tests / total_tests if total_tests > 0 else 0,
-        "average_quality_score": avg_quality
-    }
\ No newline at end of file
+        "total_tests": len(results),
+        "successful_tests": success,
+        "success_rate": success / len(results),
+        "average_quality_score": quality_sum / len(results)
+    }
@@ -1,63 +1,49 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, text
 from typing import Dict, List, Any
 from datetime import datetime, timedelta
 
 from app.db.database import get_db
-from app.db.models import User, Experiment, AgentTest
+from app.db.models import User, AgentTest
 from app.api.auth import get_current_user
 
 router = APIRouter()
 
+# All dashboard aggregates in one round-trip
+DASHBOARD_SQL = text("""
+    WITH t AS (
+        SELECT id, agent_type, task_type, created_at, result->>'status' AS status
+        FROM agent_tests
+        WHERE user_id = :uid
+    )
+    SELECT
+        (SELECT COUNT(*) FROM experiments WHERE user_id = :uid) AS total_experiments,
+        (SELECT COUNT(*) FROM t) AS total_tests,
+        (SELECT COUNT(*) FROM t WHERE status = 'completed') AS successful_tests,
+        (SELECT jsonb_object_agg(agent_type, c)
+            FROM (SELECT agent_type, COUNT(*) AS c FROM t GROUP BY agent_type) x) AS agent_usage,
+        (SELECT jsonb_agg(row_to_json(r) ORDER BY r.created_at DESC)
+            FROM (SELECT id, agent_type, task_type, created_at FROM t ORDER BY created_at DESC LIMIT 10) r) AS recent_tests
+""")
+
 @router.get("/dashboard")
 async def get_dashboard_metrics(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get dashboard metrics for the current user"""
+    row = (await db.execute(DASHBOARD_SQL, {"uid": current_user.id})).one()
     
-    # Get counts
-    total_experiments = db.query(Experiment).filter(
-        Experiment.user_id == current_user.id
-    ).count()
-    
-    total_tests = db.query(AgentTest).filter(
-        AgentTest.user_id == current_user.id
-    ).count()
-    
-    # Get recent tests
-    recent_tests = db.query(AgentTest).filter(
-        AgentTest.user_id == current_user.id
-    ).order_by(AgentTest.created_at.desc()).limit(10).all()
-    
-    # Calculate success rate
-    successful_tests = db.query(AgentTest).filter(
-        AgentTest.user_id == current_user.id,
-        AgentTest.result['status'].astext == 'completed'
-    ).count()
-    
-    success_rate = (successful_tests / total_tests * 100) if total_tests > 0 else 0
-    
-    # Agent usage distribution
-    agent_usage = {}
-    tests = db.query(AgentTest).filter(AgentTest.user_id == current_user.id).all()
-    for test in tests:
-        agent_usage[test.agent_type] = agent_usage.get(test.agent_type, 0) + 1
+    total_tests = row.total_tests
+    success_rate = (row.successful_tests / total_tests * 100) if total_tests > 0 else 0
     
     return {
-        "total_experiments": total_experiments,
+        "total_experiments": row.total_experiments,
         "total_tests": total_tests,
         "success_rate": success_rate,
-        "agent_usage": agent_usage,
-        "recent_tests": [
-            {
-                "id": test.id,
-                "agent_type": test.agent_type,
-                "task_type": test.task_type,
-                "created_at": test.created_at
-            }
-            for test in recent_tests
-        ]
+        "agent_usage": row.agent_usage or {},
+        "recent_tests": row.recent_tests or []
     }
 
 @router.get("/performance")
@@ -65,18 +51,18 @@ async def get_performance_metrics(
     agent_type: str = None,
     task_type: str = None,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get performance metrics for agents and tasks"""
     
-    query = db.query(AgentTest).filter(AgentTest.user_id == current_user.id)
+    query = select(AgentTest).where(AgentTest.user_id == current_user.id)
     
     if agent_type:
-        query = query.filter(AgentTest.agent_type == agent_type)
+        query = query.where(AgentTest.agent_type == agent_type)
     if task_type:
-        query = query.filter(AgentTest.task_type == task_type)
+        query = query.where(AgentTest.task_type == task_type)
     
-    tests = query.all()
+    tests = (await db.execute(query)).scalars().all()
     
     metrics = {
         "total_tests": len(tests),
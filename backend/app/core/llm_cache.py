@@ -0,0 +1,194 @@
+from typing import Optional
+from hashlib import sha256
+import asyncio
+import json
+import logging
+import re
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError, ResponseError
+
+from app.core.config import settings
+from app.core.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+EXACT_PREFIX = "llm:"
+SEMANTIC_PREFIX = "llmsem:"
+SEMANTIC_INDEX = "llm_semantic_idx"
+
+# Characters that must be escaped inside a RediSearch TAG query
+_TAG_ESCAPE_RE = re.compile(r"([^\w])")
+
+def _escape_tag(value: str) -> str:
+    return _TAG_ESCAPE_RE.sub(r"\\\1", value)
+
+class LLMCache:
+    """Two-tier LLM response cache: exact SHA256 match plus optional semantic match"""
+
+    def __init__(
+        self,
+        redis: Redis,
+        ttl: int = 3600,
+        semantic: bool = False,
+        threshold: float = 0.92,
+        embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"
+    ):
+        self.redis = redis
+        self.ttl = ttl
+        self.semantic = semantic
+        self.threshold = threshold
+        self.embedding_model = embedding_model
+        self._encoder = None
+        self._index_ready = False
+
+    def cache_key(self, model: str, prompt: str, temperature: float) -> Optional[str]:
+        """Exact-match key, or None when the response is non-deterministic and semantic caching is off"""
+        if temperature > 0 and not self.semantic:
+            return None
+        payload = json.dumps({"m": model, "p": prompt, "t": temperature}, sort_keys=True)
+        return sha256(payload.encode()).hexdigest()
+
+    async def get(self, key: str) -> Optional[str]:
+        """Look up an exact-match entry"""
+        try:
+            value = await self.redis.get(EXACT_PREFIX + key)
+        except RedisError as e:
+            logger.warning("LLM cache read failed: %s", e)
+            return None
+        return value.decode() if value is not None else None
+
+    async def set(self, key: str, value: str):
+        """Store an exact-match entry"""
+        try:
+            await self.redis.setex(EXACT_PREFIX + key, self.ttl, value)
+        except RedisError as e:
+            logger.warning("LLM cache write failed: %s", e)
+
+    async def lookup(self, model: str, prompt: str, temperature: float) -> Optional[str]:
+        """Check the exact tier, then the semantic tier"""
+        key = self.cache_key(model, prompt, temperature)
+        if key is None:
+            return None
+
+        hit = await self.get(key)
+        if hit is None and self.semantic:
+            hit = await self.get_similar(model, prompt)
+        return hit
+
+    async def store(self, model: str, prompt: str, temperature: float, response: str):
+        """Store a response in every enabled tier"""
+        key = self.cache_key(model, prompt, temperature)
+        if key is None:
+            return
+
+        await self.set(key, response)
+        if self.semantic:
+            await self.set_similar(model, key, prompt, response)
+
+    async def get_similar(self, model: str, prompt: str) -> Optional[str]:
+        """Return the nearest cached response if its cosine similarity clears the threshold"""
+        vector = await self._embed(prompt)
+        if vector is None or not await self._ensure_index(len(vector) // 4):
+            return None
+
+        query = f"(@model:{{{_escape_tag(model)}}})=>[KNN 1 @vec $q AS dist]"
+        try:
+            raw = await self.redis.execute_command(
+                "FT.SEARCH", SEMANTIC_INDEX, query,
+                "PARAMS", "2", "q", vector,
+                "RETURN", "2", "response", "dist",
+                "DIALECT", "2"
+            )
+        except RedisError as e:
+            logger.warning("Semantic cache search failed: %s", e)
+            return None
+
+        # Raw reply: [total, key, [field, value, ...], ...]
+        if not raw or raw[0] == 0:
+            return None
+        try:
+            fields = dict(zip(raw[2][::2], raw[2][1::2]))
+            similarity = 1.0 - float(fields[b"dist"])
+            if similarity < self.threshold:
+                return None
+            return fields[b"response"].decode()
+        except (IndexError, KeyError, ValueError) as e:
+            logger.warning("Unexpected semantic cache search reply: %s", e)
+            return None
+
+    async def set_similar(self, model: str, key: str, prompt: str, response: str):
+        """Store a response with its prompt embedding"""
+        vector = await self._embed(prompt)
+        if vector is None or not await self._ensure_index(len(vector) // 4):
+            return
+
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.hset(SEMANTIC_PREFIX + key, mapping={
+                    "model": model,
+                    "response": response,
+                    "vec": vector
+                })
+                pipe.expire(SEMANTIC_PREFIX + key, self.ttl)
+                await pipe.execute()
+        except RedisError as e:
+            logger.warning("Semantic cache write failed: %s", e)
+
+    async def _embed(self, prompt: str) -> Optional[bytes]:
+        """Embed a prompt as normalized float32 bytes (CPU-bound, runs in a thread); None on any failure"""
+        if self._encoder is None:
+            try:
+                from sentence_transformers import SentenceTransformer
+                self._encoder = await asyncio.to_thread(SentenceTransformer, self.embedding_model)
+            except ImportError:
+                logger.warning("sentence-transformers not installed, disabling semantic cache")
+                self.semantic = False
+                return None
+            except Exception as e:
+                logger.warning("Failed to load %s, disabling semantic cache: %s", self.embedding_model, e)
+                self.semantic = False
+                return None
+
+        try:
+            embedding = await asyncio.to_thread(
+                self._encoder.encode, prompt, normalize_embeddings=True
+            )
+        except Exception as e:
+            logger.warning("Semantic cache embedding failed, skipping: %s", e)
+            return None
+        return embedding.astype("float32").tobytes()
+
+    async def _ensure_index(self, dim: int) -> bool:
+        """Create the HNSW vector index once; disable the semantic tier if RediSearch is unavailable"""
+        if self._index_ready:
+            return True
+
+        try:
+            await self.redis.execute_command(
+                "FT.CREATE", SEMANTIC_INDEX, "ON", "HASH",
+                "PREFIX", "1", SEMANTIC_PREFIX,
+                "SCHEMA",
+                "model", "TAG",
+                "vec", "VECTOR", "HNSW", "6",
+                "TYPE", "FLOAT32", "DIM", str(dim), "DISTANCE_METRIC", "COSINE"
+            )
+        except ResponseError as e:
+            if "already exists" not in str(e).lower():
+                logger.warning("RediSearch unavailable, disabling semantic cache: %s", e)
+                self.semantic = False
+                return False
+        except RedisError as e:
+            logger.warning("Semantic cache index creation failed: %s", e)
+            return False
+
+        self._index_ready = True
+        return True
+
+llm_cache = LLMCache(
+    redis_client,
+    ttl=settings.LLM_CACHE_TTL,
+    semantic=settings.LLM_SEMANTIC_CACHE,
+    threshold=settings.LLM_SEMANTIC_THRESHOLD,
+    embedding_model=settings.LLM_EMBEDDING_MODEL
+)
@@ -0,0 +1,5 @@
+from redis.asyncio import Redis
+from app.core.config import settings
+
+# Shared async Redis connection pool (connects lazily on first command)
+redis_client = Redis.from_url(settings.REDIS_URL)
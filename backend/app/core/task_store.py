@@ -0,0 +1,34 @@
+from typing import Dict, Any, Optional
+import orjson
+
+from app.core.redis_client import redis_client
+
+TASK_TTL = 3600  # seconds
+
+def _task_key(task_id: str) -> str:
+    return f"task:{task_id}"
+
+def _partial_key(task_id: str) -> str:
+    return f"task:{task_id}:partial"
+
+async def set_task(task_id: str, state: Dict[str, Any]):
+    """Store task state, expiring after TASK_TTL"""
+    await redis_client.setex(_task_key(task_id), TASK_TTL, orjson.dumps(state))
+
+async def get_task(task_id: str) -> Optional[Dict[str, Any]]:
+    """Get task state, including streamed output while the task is still running"""
+    raw, partial = await redis_client.mget(_task_key(task_id), _partial_key(task_id))
+    if raw is None:
+        return None
+
+    state = orjson.loads(raw)
+    if state.get("status") == "processing" and partial is not None:
+        state["partial"] = partial.decode()
+    return state
+
+async def append_task_output(task_id: str, chunk: str):
+    """Append a streamed output chunk without rewriting the whole state"""
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.append(_partial_key(task_id), chunk)
+        pipe.expire(_partial_key(task_id), TASK_TTL)
+        await pipe.execute()
@@ -1,7 +1,10 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey, Float, Text, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey, Float, Text, Boolean, Index, text
 from sqlalchemy.orm import relationship
 from app.db.database import Base
-from datetime import datetime
+from datetime import datetime, timezone
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
 
 class User(Base):
     __tablename__ = "users"
@@ -11,7 +14,7 @@ class User(Base):
     email = Column(String, unique=True, index=True)
     hashed_password = Column(String)
     is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), default=_utcnow)
     
     experiments = relationship("Experiment", back_populates="user")
     agent_tests = relationship("AgentTest", back_populates="user")
@@ -29,9 +32,9 @@ class Experiment(Base):
     config = Column(JSON)  # Configuration
     status = Column(String, default="created")
     results = Column(JSON)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    started_at = Column(DateTime, nullable=True)
-    completed_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime(timezone=True), default=_utcnow)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    completed_at = Column(DateTime(timezone=True), nullable=True)
     
     user = relationship("User", back_populates="experiments")
     agent_tests = relationship("AgentTest", back_populates="experiment")
@@ -46,7 +49,20 @@ class AgentTest(Base):
     task_type = Column(String)
     parameters = Column(JSON)
     result = Column(JSON)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), default=_utcnow)
     
     user = relationship("User", back_populates="agent_tests")
-    experiment = relationship("Experiment", back_populates="agent_tests")
\ No newline at end of file
+    experiment = relationship("Experiment", back_populates="agent_tests")
+    
+    __table_args__ = (
+        # Dashboard filters by user and orders by newest first
+        Index("ix_agent_tests_user_id_created_at", "user_id", text("created_at DESC")),
+        # Success counts filter on result->>'status'
+        Index("idx_agenttest_result_status", text("(result->>'status')")),
+        # Experiment summary aggregates quality_score per experiment
+        Index(
+            "idx_agenttest_exp_quality",
+            "experiment_id",
+            text("((result->'metrics'->>'quality_score')::float)")
+        ),
+    )
\ No newline at end of file
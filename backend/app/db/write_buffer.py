@@ -0,0 +1,83 @@
+from typing import List, Optional
+import asyncio
+import logging
+
+from app.db.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Queued by stop(); the flusher writes its current batch and exits when it reaches it
+_STOP = object()
+
+class WriteBuffer:
+    """Write-behind queue that batches ORM inserts into a single commit"""
+
+    def __init__(self, max_batch: int = 50, max_delay: float = 0.1):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start the flusher on the running event loop"""
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flusher and write whatever is still queued"""
+        if self._task is None:
+            return
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+
+        # Records queued behind the stop marker while the last batch was being written
+        batch = []
+        while not self._queue.empty():
+            record = self._queue.get_nowait()
+            if record is not _STOP:
+                batch.append(record)
+        if batch:
+            await self._write(batch)
+
+    async def put(self, record):
+        """Queue a record for the next batch insert"""
+        self.start()
+        await self._queue.put(record)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            record = await self._queue.get()
+            if record is _STOP:
+                return
+            batch = [record]
+            deadline = loop.time() + self.max_delay
+
+            # Collect until the batch is full, the delay has elapsed or stop() was called
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    record = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if record is _STOP:
+                    stopping = True
+                    break
+                batch.append(record)
+
+            await self._write(batch)
+
+    async def _write(self, batch: List):
+        try:
+            async with SessionLocal() as db:
+                await db.run_sync(lambda session: session.bulk_save_objects(batch))
+                await db.commit()
+        except Exception as e:
+            logger.error("Failed to write %d buffered records: %s", len(batch), e)
+
+write_buffer = WriteBuffer()
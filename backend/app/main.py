@@ -1,25 +1,52 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from sse_starlette.sse import EventSourceResponse
 from pydantic import BaseModel, Field
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, AsyncIterator, NamedTuple
 import os
 from datetime import datetime 
-import uuid 
+import secrets
 import time 
 import asyncio      
+from collections import Counter, defaultdict, deque
+from itertools import islice
+from bisect import bisect_right
 from enum import Enum
 from dotenv import load_dotenv
 import httpx
 import re
+import io
+import json
+import hashlib
+import logging
+import ahocorasick
+import google.generativeai as genai
 from huggingface_hub import InferenceClient
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Most recent test results kept in memory
+MAX_RESULTS = int(os.getenv("MAX_RESULTS", "10000"))
+
+# Agent response cache sizing
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "10000"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+
+# Longest response the analyzer will scan; anything beyond is ignored
+MAX_ANALYZE_CHARS = int(os.getenv("MAX_ANALYZE_CHARS", str(64 * 1024)))
+
+# Concurrent agent calls per /api/test_batch request
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "20"))
+
 app = FastAPI(
     title="AI Agent Testing Platform",
     description="Platform for testing and analyzing external AI agents",
-    version="5.0.0"
+    version="5.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # CORS configuration
@@ -31,6 +58,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Shared HTTP/2 client so concurrent provider calls multiplex over pooled connections
+@app.on_event("startup")
+async def open_http_client():
+    app.state.http = httpx.AsyncClient(
+        http2=True,
+        timeout=httpx.Timeout(60.0, connect=10.0),
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50, keepalive_expiry=30.0)
+    )
+
+@app.on_event("shutdown")
+async def close_http_client():
+    await app.state.http.aclose()
+
 # Enums
 class TaskType(str, Enum):
     IDEA_GENERATION = "idea_generation"
@@ -63,41 +103,166 @@ class AnalysisResult(BaseModel):
     recommendations: List[str]
     detailed_scores: Dict[str, float]
 
+class TestRecord(NamedTuple):
+    """A stored test result; tuple-backed so thousands of them stay compact"""
+    test_id: str
+    started_ns: int  # wall-clock start, formatted only when serialized
+    agent_name: str
+    agent_type: str
+    task_type: str
+    test_input: str
+    success: bool
+    agent_response: Optional[str] = None
+    execution_time: Optional[float] = None
+    analysis: Optional[Dict] = None
+    error: Optional[str] = None
+    cached: bool = False  # answered from the response cache, not by a fresh agent call
+    
+    def to_dict(self) -> Dict:
+        """Serialize in the shape the API returns"""
+        timestamp = datetime.fromtimestamp(self.started_ns / 1e9).isoformat()
+        if self.success:
+            return {
+                "test_id": self.test_id,
+                "timestamp": timestamp,
+                "agent_name": self.agent_name,
+                "agent_type": self.agent_type,
+                "task_type": self.task_type,
+                "test_input": self.test_input,
+                "agent_response": self.agent_response,
+                "execution_time": self.execution_time,
+                "analysis": self.analysis,
+                "cached": self.cached,
+                "success": True
+            }
+        return {
+            "test_id": self.test_id,
+            "timestamp": timestamp,
+            "agent_name": self.agent_name,
+            "task_type": self.task_type,
+            "test_input": self.test_input,
+            "error": self.error,
+            "success": False
+        }
+
 # Global storage for test results
 class TestingPlatform:
     def __init__(self):
-        self.test_results = []
+        self.test_results = deque(maxlen=MAX_RESULTS)
         self.agent_profiles = {}
         self.comparison_data = {}
+        
+        # Running totals so read endpoints never rescan test_results
+        self.global_total = 0
+        self.global_success = 0
+        self.task_counts = Counter()
     
-    def add_test_result(self, result: Dict):
+    def add_test_result(self, result: TestRecord):
         self.test_results.append(result)
         
+        self.global_total += 1
+        self.task_counts[result.task_type] += 1
+        
         # Update agent profile
-        agent_name = result["agent_name"]
+        agent_name = result.agent_name
         if agent_name not in self.agent_profiles:
             self.agent_profiles[agent_name] = {
                 "total_tests": 0,
-                "scores": [],
-                "task_performance": {}
+                "score_sum": 0.0,
+                "score_count": 0,
+                "best_score": float("-inf"),
+                "worst_score": float("inf"),
+                "task_sum": defaultdict(float),
+                "task_count": defaultdict(int)
             }
         
         profile = self.agent_profiles[agent_name]
         profile["total_tests"] += 1
-        if result["success"]:
-            profile["scores"].append(result["analysis"]["overall_score"])
+        if result.success:
+            self.global_success += 1
+            score = result.analysis["overall_score"]
+            profile["score_sum"] += score
+            profile["score_count"] += 1
+            profile["best_score"] = max(profile["best_score"], score)
+            profile["worst_score"] = min(profile["worst_score"], score)
             
-            task = result["task_type"]
-            if task not in profile["task_performance"]:
-                profile["task_performance"][task] = []
-            profile["task_performance"][task].append(result["analysis"]["overall_score"])
+            task = result.task_type
+            profile["task_sum"][task] += score
+            profile["task_count"][task] += 1
 
 platform = TestingPlatform()
 
+class ResponseCache:
+    """In-memory TTL cache of agent responses, keyed by what was sent to the agent"""
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.store: Dict[str, tuple[str, float]] = {}
+    
+    @staticmethod
+    def key(request: TestRequest, prompt: str) -> str:
+        # Whitespace differences in the prompt should not cause a miss
+        normalized = " ".join(prompt.split())
+        # Different credentials can see different models or quotas, so they never share entries
+        api_key = request.agent_api_key
+        key_hash = hashlib.sha256(api_key.encode()).hexdigest() if api_key else None
+        payload = json.dumps(
+            [request.agent_type, request.agent_endpoint, key_hash, request.task_type.value, normalized, request.test_parameters],
+            sort_keys=True, default=str
+        )
+        return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+    
+    def get(self, key: str) -> Optional[str]:
+        entry = self.store.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del self.store[key]
+            return None
+        return value
+    
+    def set(self, key: str, value: str):
+        # A size of 0 (or less) turns the cache off
+        if self.maxsize <= 0:
+            return
+        # Dicts keep insertion order, so the first key is the oldest entry
+        self.store.pop(key, None)
+        if len(self.store) >= self.maxsize:
+            del self.store[next(iter(self.store))]
+        self.store[key] = (value, time.monotonic() + self.ttl)
+
+response_cache = ResponseCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL)
+
+# Key last passed to genai.configure
+_google_api_key: Optional[str] = None
+
+# Standardized prompt for each task type
+PROMPT_TEMPLATES = {
+    TaskType.IDEA_GENERATION: "Generate 5 innovative research ideas for: {}",
+    TaskType.PROPOSAL_WRITING: "Write a research proposal for: {}",
+    TaskType.EXPERIMENT_DESIGN: "Design an experiment to test: {}",
+    TaskType.PAPER_WRITING: "Write an introduction section for a paper on: {}",
+    TaskType.LITERATURE_REVIEW: "Provide a literature review on: {}",
+    TaskType.CODE_GENERATION: "Write code to implement: {}",
+    TaskType.PROBLEM_SOLVING: "Solve this problem: {}",
+    TaskType.SUMMARIZATION: "Summarize the following: {}"
+}
+
 # Agent Connector - Connects to external AI agents
 class AgentConnector:
     """Connects to and executes external AI agents"""
     
+    @staticmethod
+    def cached_response(request: TestRequest) -> Optional[str]:
+        """
+        Earlier response to an identical request, if still cached
+        Callers decide how a cache hit is recorded; execute_agent and stream_agent always call the agent
+        """
+        prompt = AgentConnector._create_prompt(request.task_type, request.test_input)
+        return response_cache.get(ResponseCache.key(request, prompt))
+    
     @staticmethod
     async def execute_agent(request: TestRequest) -> tuple[str, float]:
         """
@@ -108,15 +273,18 @@ class AgentConnector:
         
         # Generate the prompt based on task type
         prompt = AgentConnector._create_prompt(request.task_type, request.test_input)
+        cache_key = ResponseCache.key(request, prompt)
+        
+        client = app.state.http
         
         try:
             if request.agent_type == "openai":
                 response = await AgentConnector._call_openai(
-                    prompt, request.agent_endpoint, request.agent_api_key
+                    client, prompt, request.agent_endpoint, request.agent_api_key
                 )
             elif request.agent_type == "anthropic":
                 response = await AgentConnector._call_anthropic(
-                    prompt, request.agent_endpoint, request.agent_api_key
+                    client, prompt, request.agent_endpoint, request.agent_api_key
                 )
             elif request.agent_type == "google":
                 response = await AgentConnector._call_google(
@@ -124,167 +292,372 @@ class AgentConnector:
                 )
             elif request.agent_type == "huggingface":
                 response = await AgentConnector._call_huggingface(
-                    prompt, request.agent_endpoint, request.agent_api_key
+                    client, prompt, request.agent_endpoint, request.agent_api_key
                 )
             else:
                 # Custom API endpoint
                 response = await AgentConnector._call_custom_api(
-                    prompt, request.agent_endpoint, request.agent_api_key, request.test_parameters
+                    client, prompt, request.agent_endpoint, request.agent_api_key, request.test_parameters
                 )
             
             execution_time = time.time() - start_time
+            response_cache.set(cache_key, response)
             return response, execution_time
             
         except Exception as e:
             raise Exception(f"Failed to execute agent: {str(e)}")
     
     @staticmethod
-    def _create_prompt(task_type: TaskType, test_input: str) -> str:
-        """Create a standardized prompt for the task"""
+    async def stream_agent(request: TestRequest) -> AsyncIterator[str]:
+        """
+        Stream the agent's response as it is generated
+        Providers without a streaming path are called normally and yield once
+        """
+        if request.agent_type not in STREAMING_AGENTS:
+            response, _ = await AgentConnector.execute_agent(request)
+            yield response
+            return
         
-        prompts = {
-            TaskType.IDEA_GENERATION: f"Generate 5 innovative research ideas for: {test_input}",
-            TaskType.PROPOSAL_WRITING: f"Write a research proposal for: {test_input}",
-            TaskType.EXPERIMENT_DESIGN: f"Design an experiment to test: {test_input}",
-            TaskType.PAPER_WRITING: f"Write an introduction section for a paper on: {test_input}",
-            TaskType.LITERATURE_REVIEW: f"Provide a literature review on: {test_input}",
-            TaskType.CODE_GENERATION: f"Write code to implement: {test_input}",
-            TaskType.PROBLEM_SOLVING: f"Solve this problem: {test_input}",
-            TaskType.SUMMARIZATION: f"Summarize the following: {test_input}"
-        }
+        prompt = AgentConnector._create_prompt(request.task_type, request.test_input)
+        cache_key = ResponseCache.key(request, prompt)
+        
+        stream = STREAMING_AGENTS[request.agent_type](
+            app.state.http, prompt, request.agent_endpoint, request.agent_api_key
+        )
+        buffer = io.StringIO()
+        try:
+            async for chunk in stream:
+                buffer.write(chunk)
+                yield chunk
+        except Exception as e:
+            raise Exception(f"Failed to execute agent: {str(e)}")
         
-        return prompts.get(task_type, test_input)
+        response_cache.set(cache_key, buffer.getvalue())
     
     @staticmethod
-    async def _call_openai(prompt: str, endpoint: str, api_key: str) -> str:
-        """Call OpenAI API"""
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(
-                endpoint or "https://api.openai.com/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": "gpt-3.5-turbo",
-                    "messages": [{"role": "user", "content": prompt}],
-                    "max_tokens": 2000,
-                    "temperature": 0.7
-                }
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                return data["choices"][0]["message"]["content"]
-            else:
+    async def _stream_sse(client: httpx.AsyncClient, url: str, headers: Dict, payload: Dict) -> AsyncIterator[Dict]:
+        """POST a streaming request and yield each decoded SSE data event"""
+        async with client.stream("POST", url, headers=headers, json=payload) as response:
+            if response.status_code != 200:
+                await response.aread()
                 raise Exception(f"API error: {response.status_code} - {response.text}")
+            
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                yield json.loads(data)
     
     @staticmethod
-    async def _call_anthropic(prompt: str, endpoint: str, api_key: str) -> str:
-        """Call Anthropic API"""
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(
-                endpoint or "https://api.anthropic.com/v1/messages",
-                headers={
-                    "x-api-key": api_key,
-                    "anthropic-version": "2023-06-01",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": "claude-3-sonnet-20240229",
-                    "messages": [{"role": "user", "content": prompt}],
-                    "max_tokens": 2000
-                }
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                return data["content"][0]["text"]
-            else:
-                raise Exception(f"API error: {response.status_code} - {response.text}")
+    async def _stream_openai(client: httpx.AsyncClient, prompt: str, endpoint: str, api_key: str) -> AsyncIterator[str]:
+        """Stream from the OpenAI API"""
+        events = AgentConnector._stream_sse(
+            client,
+            endpoint or "https://api.openai.com/v1/chat/completions",
+            {
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json"
+            },
+            {
+                "model": "gpt-3.5-turbo",
+                "messages": [{"role": "user", "content": prompt}],
+                "max_tokens": 2000,
+                "temperature": 0.7,
+                "stream": True
+            }
+        )
+        async for event in events:
+            choices = event.get("choices") or [{}]
+            text = choices[0].get("delta", {}).get("content")
+            if text:
+                yield text
     
+    @staticmethod
+    async def _stream_anthropic(client: httpx.AsyncClient, prompt: str, endpoint: str, api_key: str) -> AsyncIterator[str]:
+        """Stream from the Anthropic API"""
+        events = AgentConnector._stream_sse(
+            client,
+            endpoint or "https://api.anthropic.com/v1/messages",
+            {
+                "x-api-key": api_key,
+                "anthropic-version": "2023-06-01",
+                "Content-Type": "application/json"
+            },
+            {
+                "model": "claude-3-sonnet-20240229",
+                "messages": [{"role": "user", "content": prompt}],
+                "max_tokens": 2000,
+                "stream": True
+            }
+        )
+        async for event in events:
+            if event.get("type") == "content_block_delta":
+                text = event["delta"].get("text")
+                if text:
+                    yield text
+    
+    @staticmethod
+    def _create_prompt(task_type: TaskType, test_input: str) -> str:
+        """Create a standardized prompt for the task"""
+        return PROMPT_TEMPLATES.get(task_type, "{}").format(test_input)
+    
+    @staticmethod
+    async def _call_openai(client: httpx.AsyncClient, prompt: str, endpoint: str, api_key: str) -> str:
+        """Call OpenAI API"""
+        response = await client.post(
+            endpoint or "https://api.openai.com/v1/chat/completions",
+            headers={
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json"
+            },
+            json={
+                "model": "gpt-3.5-turbo",
+                "messages": [{"role": "user", "content": prompt}],
+                "max_tokens": 2000,
+                "temperature": 0.7
+            }
+        )
+        
+        if response.status_code == 200:
+            data = response.json()
+            return data["choices"][0]["message"]["content"]
+        else:
+            raise Exception(f"API error: {response.status_code} - {response.text}")
+
+    @staticmethod
+    async def _call_anthropic(client: httpx.AsyncClient, prompt: str, endpoint: str, api_key: str) -> str:
+        """Call Anthropic API"""
+        response = await client.post(
+            endpoint or "https://api.anthropic.com/v1/messages",
+            headers={
+                "x-api-key": api_key,
+                "anthropic-version": "2023-06-01",
+                "Content-Type": "application/json"
+            },
+            json={
+                "model": "claude-3-sonnet-20240229",
+                "messages": [{"role": "user", "content": prompt}],
+                "max_tokens": 2000
+            }
+        )
+        
+        if response.status_code == 200:
+            data = response.json()
+            return data["content"][0]["text"]
+        else:
+            raise Exception(f"API error: {response.status_code} - {response.text}")
+
     @staticmethod
     async def _call_google(prompt: str, endpoint: str, api_key: str) -> str:
         """Call Google Gemini API"""
-        import google.generativeai as genai
-        genai.configure(api_key=api_key)
+        global _google_api_key
+        # configure() is process-wide, so only redo it when the key changes
+        if api_key != _google_api_key:
+            genai.configure(api_key=api_key)
+            _google_api_key = api_key
         model = genai.GenerativeModel('gemini-2.5-flash')
-        response = model.generate_content(prompt)
+        response = await model.generate_content_async(prompt)
         return response.text
     
     @staticmethod
-    async def _call_huggingface(prompt: str, endpoint: str, api_key: str) -> str:
+    async def _call_huggingface(client: httpx.AsyncClient, prompt: str, endpoint: str, api_key: str) -> str:
         """Call HuggingFace API"""
-        print(f"DEBUG - Endpoint: {endpoint}")
-        print(f"DEBUG - API Key (first 10 chars): {api_key[:10]}...")
-        print(f"DEBUG - Prompt: {prompt[:100]}...")
-        
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            # Try simple payload first
-            payload = {"inputs": prompt}
-            print(f"DEBUG - Payload: {payload}")
-            
-            response = await client.post(
-                endpoint,
-                headers={
-                    "Authorization": f"Bearer {api_key}",
-                    "Content-Type": "application/json"
-                },
-                json=payload
-            )
-            
-            print(f"DEBUG - Status Code: {response.status_code}")
-            print(f"DEBUG - Response: {response.text[:500]}...")
-            
-            if response.status_code == 200:
-                data = response.json()
-                # Handle different response formats
-                if isinstance(data, list):
-                    if len(data) > 0:
-                        if isinstance(data[0], dict):
-                            return data[0].get("generated_text", str(data[0]))
-                        return str(data[0])
-                elif isinstance(data, dict):
-                    return data.get("generated_text", data.get("text", str(data)))
-                return str(data)
-            elif response.status_code == 503:
-                raise Exception(f"Model is loading, please try again in a few seconds")
-            else:
-                raise Exception(f"HuggingFace API error: {response.status_code} - {response.text}")
-
+        logger.debug("HuggingFace request to %s, prompt: %.100s", endpoint, prompt)
+        
+        # Try simple payload first
+        payload = {"inputs": prompt}
+        
+        response = await client.post(
+            endpoint,
+            headers={
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json"
+            },
+            json=payload
+        )
         
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("HuggingFace response %s: %.500s", response.status_code, response.text)
+        
+        if response.status_code == 200:
+            data = response.json()
+            # Handle different response formats
+            if isinstance(data, list):
+                if len(data) > 0:
+                    if isinstance(data[0], dict):
+                        return data[0].get("generated_text", str(data[0]))
+                    return str(data[0])
+            elif isinstance(data, dict):
+                return data.get("generated_text", data.get("text", str(data)))
+            return str(data)
+        elif response.status_code == 503:
+            raise Exception(f"Model is loading, please try again in a few seconds")
+        else:
+            raise Exception(f"HuggingFace API error: {response.status_code} - {response.text}")
+
+    
     @staticmethod
-    async def _call_custom_api(prompt: str, endpoint: str, api_key: str, parameters: Dict) -> str:
+    async def _call_custom_api(client: httpx.AsyncClient, prompt: str, endpoint: str, api_key: str, parameters: Dict) -> str:
         """Call custom API endpoint"""
         headers = {"Content-Type": "application/json"}
         if api_key:
             headers["Authorization"] = f"Bearer {api_key}"
         
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(
-                endpoint,
-                headers=headers,
-                json={
-                    "prompt": prompt,
-                    "input": prompt,
-                    "query": prompt,
-                    **parameters
-                }
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                # Try to extract response from common field names
-                if isinstance(data, str):
-                    return data
-                for field in ["output", "response", "text", "generated_text", "result", "completion"]:
-                    if field in data:
-                        return str(data[field])
-                return str(data)
-            else:
-                raise Exception(f"API error: {response.status_code} - {response.text}")
+        response = await client.post(
+            endpoint,
+            headers=headers,
+            json={
+                "prompt": prompt,
+                "input": prompt,
+                "query": prompt,
+                **parameters
+            }
+        )
+        
+        if response.status_code == 200:
+            data = response.json()
+            # Try to extract response from common field names
+            if isinstance(data, str):
+                return data
+            for field in ["output", "response", "text", "generated_text", "result", "completion"]:
+                if field in data:
+                    return str(data[field])
+            return str(data)
+        else:
+            raise Exception(f"API error: {response.status_code} - {response.text}")
+
+# Agent types with a native streaming path
+STREAMING_AGENTS = {
+    "openai": AgentConnector._stream_openai,
+    "anthropic": AgentConnector._stream_anthropic
+}
 
 # Response Analyzer - Analyzes AI agent outputs
+
+# Patterns and keyword sets, built once at import
+SENTENCE_RE = re.compile(r'[.!?]+')
+# Multiline so one search covers every line of the response
+SECTION_RE = re.compile(r'^#', re.MULTILINE)
+LIST_RE = re.compile(r'^\s*[\d\-\*\•]', re.MULTILINE)
+
+RELEVANCE_KW = {
+    TaskType.IDEA_GENERATION: frozenset(["idea", "concept", "innovation", "approach", "solution"]),
+    TaskType.PROPOSAL_WRITING: frozenset(["objective", "methodology", "timeline", "budget", "outcome"]),
+    TaskType.EXPERIMENT_DESIGN: frozenset(["hypothesis", "method", "control", "variable", "measurement"]),
+    TaskType.PAPER_WRITING: frozenset(["abstract", "introduction", "conclusion", "reference", "analysis"]),
+    TaskType.LITERATURE_REVIEW: frozenset(["review", "study", "research", "finding", "paper"]),
+    TaskType.CODE_GENERATION: frozenset(["function", "class", "import", "return", "def"]),
+    TaskType.PROBLEM_SOLVING: frozenset(["solution", "step", "answer", "result", "approach"]),
+    TaskType.SUMMARIZATION: frozenset(["summary", "main", "key", "point", "conclusion"])
+}
+
+# Minimum expected word counts for each task
+MIN_WORDS = {
+    TaskType.IDEA_GENERATION: 200,
+    TaskType.PROPOSAL_WRITING: 500,
+    TaskType.EXPERIMENT_DESIGN: 300,
+    TaskType.PAPER_WRITING: 400,
+    TaskType.LITERATURE_REVIEW: 500,
+    TaskType.CODE_GENERATION: 50,
+    TaskType.PROBLEM_SOLVING: 100,
+    TaskType.SUMMARIZATION: 150
+}
+
+DETAIL_INDICATORS = frozenset([
+    "for example", "such as", "specifically", "in particular",
+    "furthermore", "additionally", "moreover", "therefore",
+    "because", "due to", "as a result", "consequently"
+])
+
+TECHNICAL_TERMS = frozenset([
+    "algorithm", "methodology", "framework", "architecture",
+    "implementation", "optimization", "evaluation", "analysis",
+    "hypothesis", "validation", "correlation", "distribution"
+])
+
+FILLER_PHRASES = frozenset([
+    "i don't know", "i'm not sure", "i cannot", "unable to",
+    "no information", "cannot provide", "don't have"
+])
+
+CREATIVE_WORDS = frozenset([
+    "innovative", "novel", "unique", "creative", "original",
+    "breakthrough", "revolutionary", "pioneering", "cutting-edge",
+    "unprecedented", "groundbreaking", "ingenious"
+])
+
+TRANSITIONS = frozenset([
+    "first", "second", "third", "finally", "however",
+    "therefore", "thus", "moreover", "furthermore",
+    "in addition", "consequently", "as a result",
+    "on the other hand", "in contrast", "similarly"
+])
+
+def _build_automaton(keywords: frozenset) -> ahocorasick.Automaton:
+    automaton = ahocorasick.Automaton()
+    for keyword in keywords:
+        automaton.add_word(keyword, keyword)
+    automaton.make_automaton()
+    return automaton
+
+# One Aho-Corasick automaton per keyword set, so each scorer scans the text once
+AUTOMATA = {
+    keywords: _build_automaton(keywords)
+    for keywords in [
+        *RELEVANCE_KW.values(), DETAIL_INDICATORS, TECHNICAL_TERMS,
+        FILLER_PHRASES, CREATIVE_WORDS, TRANSITIONS
+    ]
+}
+
+# Weight of each aspect in the overall score
+SCORE_WEIGHTS = {
+    "relevance": 0.20,
+    "completeness": 0.20,
+    "clarity": 0.15,
+    "structure": 0.10,
+    "depth": 0.15,
+    "accuracy": 0.10,
+    "creativity": 0.05,
+    "coherence": 0.05
+}
+
+# Lower bounds for grades D, C, B and A; anything below is an F
+GRADE_THRESHOLDS = (60, 70, 80, 90)
+GRADES = "FDCBA"
+
+def score_to_grade(score: float) -> str:
+    """Map a 0-100 score to a letter grade"""
+    return GRADES[bisect_right(GRADE_THRESHOLDS, score)]
+
+def count_keywords(keywords: frozenset, text: str) -> int:
+    """Count how many distinct keywords occur in text"""
+    return len({keyword for _, keyword in AUTOMATA[keywords].iter(text)})
+
+def has_keyword(keywords: frozenset, text: str) -> bool:
+    """Check whether any keyword occurs in text, stopping at the first hit"""
+    return next(AUTOMATA[keywords].iter(text), None) is not None
+
+class TaskProfile(NamedTuple):
+    """Everything task-specific the analyzer needs, resolved once per task type"""
+    keywords: Optional[frozenset]
+    min_words: int
+    creative: bool
+    wants_creativity_tip: bool
+    wants_code_fence: bool
+
+TASK_PROFILES = {
+    task_type: TaskProfile(
+        keywords=RELEVANCE_KW.get(task_type),
+        min_words=MIN_WORDS.get(task_type, 200),
+        creative=task_type in (TaskType.IDEA_GENERATION, TaskType.PROBLEM_SOLVING),
+        wants_creativity_tip=task_type == TaskType.IDEA_GENERATION,
+        wants_code_fence=task_type == TaskType.CODE_GENERATION
+    )
+    for task_type in TaskType
+}
+
 class ResponseAnalyzer:
     """Analyzes and scores AI agent responses"""
     
@@ -295,53 +668,47 @@ class ResponseAnalyzer:
         This is where we evaluate the quality of the agent's output
         """
         
+        # Bound scoring work for runaway or abusive outputs
+        response_length = len(response)
+        truncated = response_length > MAX_ANALYZE_CHARS
+        if truncated:
+            response = response[:MAX_ANALYZE_CHARS]
+        
+        # Lowercase, tokenize and split once; every scorer reads these
+        response_lower = response.lower()
+        tokens = response_lower.split()
+        sentences = SENTENCE_RE.split(response_lower)
+        lines = response.split('\n')
+        paragraphs = response.split('\n\n')
+        profile = TASK_PROFILES[task_type]
+        
         # Calculate different aspects of quality
         scores = {
-            "relevance": ResponseAnalyzer._score_relevance(response, task_type),
-            "completeness": ResponseAnalyzer._score_completeness(response, task_type),
-            "clarity": ResponseAnalyzer._score_clarity(response),
-            "structure": ResponseAnalyzer._score_structure(response),
-            "depth": ResponseAnalyzer._score_depth(response),
-            "accuracy": ResponseAnalyzer._score_accuracy(response, task_type),
-            "creativity": ResponseAnalyzer._score_creativity(response, task_type),
-            "coherence": ResponseAnalyzer._score_coherence(response)
+            "relevance": ResponseAnalyzer._score_relevance(response_lower, profile.keywords),
+            "completeness": ResponseAnalyzer._score_completeness(tokens, profile.min_words),
+            "clarity": ResponseAnalyzer._score_clarity(sentences),
+            "structure": ResponseAnalyzer._score_structure(response, paragraphs),
+            "depth": ResponseAnalyzer._score_depth(response_lower),
+            "accuracy": ResponseAnalyzer._score_accuracy(response_lower, lines),
+            # Neutral score for non-creative tasks
+            "creativity": ResponseAnalyzer._score_creativity(response_lower, tokens) if profile.creative else 0.7,
+            "coherence": ResponseAnalyzer._score_coherence(response_lower, paragraphs)
         }
         
         # Basic metrics
         metrics = {
-            "response_length": len(response),
-            "word_count": len(response.split()),
-            "sentence_count": len(re.split(r'[.!?]+', response)),
-            "paragraph_count": len(response.split('\n\n')),
+            "response_length": response_length,
+            "truncated": truncated,
+            "word_count": len(tokens),
+            "sentence_count": len(sentences),
+            "paragraph_count": len(paragraphs),
             "execution_time": round(execution_time, 2),
-            "avg_sentence_length": len(response.split()) / max(1, len(re.split(r'[.!?]+', response)))
+            "avg_sentence_length": len(tokens) / max(1, len(sentences))
         }
         
         # Calculate overall score (weighted average)
-        weights = {
-            "relevance": 0.20,
-            "completeness": 0.20,
-            "clarity": 0.15,
-            "structure": 0.10,
-            "depth": 0.15,
-            "accuracy": 0.10,
-            "creativity": 0.05,
-            "coherence": 0.05
-        }
-        
-        overall_score = sum(scores[k] * weights[k] for k in scores) * 100
-        
-        # Determine grade
-        if overall_score >= 90:
-            grade = "A"
-        elif overall_score >= 80:
-            grade = "B"
-        elif overall_score >= 70:
-            grade = "C"
-        elif overall_score >= 60:
-            grade = "D"
-        else:
-            grade = "F"
+        overall_score = sum(scores[k] * weight for k, weight in SCORE_WEIGHTS.items()) * 100
+        grade = score_to_grade(overall_score)
         
         # Identify strengths and weaknesses
         strengths = []
@@ -354,7 +721,7 @@ class ResponseAnalyzer:
                 weaknesses.append(f"Poor {aspect}")
         
         # Generate recommendations
-        recommendations = ResponseAnalyzer._generate_recommendations(scores, task_type)
+        recommendations = ResponseAnalyzer._generate_recommendations(scores, profile, response)
         
         return AnalysisResult(
             overall_score=round(overall_score, 2),
@@ -367,46 +734,21 @@ class ResponseAnalyzer:
         )
     
     @staticmethod
-    def _score_relevance(response: str, task_type: TaskType) -> float:
+    def _score_relevance(response_lower: str, keywords: Optional[frozenset]) -> float:
         """Score how relevant the response is to the task"""
         
         # Check for task-specific keywords
-        relevance_keywords = {
-            TaskType.IDEA_GENERATION: ["idea", "concept", "innovation", "approach", "solution"],
-            TaskType.PROPOSAL_WRITING: ["objective", "methodology", "timeline", "budget", "outcome"],
-            TaskType.EXPERIMENT_DESIGN: ["hypothesis", "method", "control", "variable", "measurement"],
-            TaskType.PAPER_WRITING: ["abstract", "introduction", "conclusion", "reference", "analysis"],
-            TaskType.LITERATURE_REVIEW: ["review", "study", "research", "finding", "paper"],
-            TaskType.CODE_GENERATION: ["function", "class", "import", "return", "def"],
-            TaskType.PROBLEM_SOLVING: ["solution", "step", "answer", "result", "approach"],
-            TaskType.SUMMARIZATION: ["summary", "main", "key", "point", "conclusion"]
-        }
-        
-        keywords = relevance_keywords.get(task_type, [])
         if not keywords:
             return 0.7
         
-        found = sum(1 for kw in keywords if kw.lower() in response.lower())
+        found = count_keywords(keywords, response_lower)
         return min(1.0, found / len(keywords))
     
     @staticmethod
-    def _score_completeness(response: str, task_type: TaskType) -> float:
+    def _score_completeness(tokens: List[str], expected: int) -> float:
         """Score how complete the response is"""
         
-        # Minimum expected word counts for each task
-        min_words = {
-            TaskType.IDEA_GENERATION: 200,
-            TaskType.PROPOSAL_WRITING: 500,
-            TaskType.EXPERIMENT_DESIGN: 300,
-            TaskType.PAPER_WRITING: 400,
-            TaskType.LITERATURE_REVIEW: 500,
-            TaskType.CODE_GENERATION: 50,
-            TaskType.PROBLEM_SOLVING: 100,
-            TaskType.SUMMARIZATION: 150
-        }
-        
-        expected = min_words.get(task_type, 200)
-        actual = len(response.split())
+        actual = len(tokens)
         
         if actual >= expected:
             return 1.0
@@ -414,10 +756,9 @@ class ResponseAnalyzer:
             return actual / expected
     
     @staticmethod
-    def _score_clarity(response: str) -> float:
+    def _score_clarity(sentences: List[str]) -> float:
         """Score the clarity of writing"""
         
-        sentences = re.split(r'[.!?]+', response)
         sentences = [s for s in sentences if len(s.strip()) > 0]
         
         if not sentences:
@@ -439,13 +780,13 @@ class ResponseAnalyzer:
         return clarity_score
     
     @staticmethod
-    def _score_structure(response: str) -> float:
+    def _score_structure(response: str, paragraphs: List[str]) -> float:
         """Score the structure and organization"""
         
         # Check for structural elements
-        has_paragraphs = len(response.split('\n\n')) > 1
-        has_sections = any(line.startswith('#') for line in response.split('\n'))
-        has_lists = any(re.match(r'^\s*[\d\-\*\•]', line) for line in response.split('\n'))
+        has_paragraphs = len(paragraphs) > 1
+        has_sections = SECTION_RE.search(response) is not None
+        has_lists = LIST_RE.search(response) is not None
         has_formatting = '**' in response or '__' in response or '*' in response
         
         score = 0
@@ -461,94 +802,55 @@ class ResponseAnalyzer:
         return score
     
     @staticmethod
-    def _score_depth(response: str) -> float:
+    def _score_depth(response_lower: str) -> float:
         """Score the depth and detail of the response"""
         
-        # Check for detailed explanations
-        detail_indicators = [
-            "for example", "such as", "specifically", "in particular",
-            "furthermore", "additionally", "moreover", "therefore",
-            "because", "due to", "as a result", "consequently"
-        ]
-        
-        detail_count = sum(1 for indicator in detail_indicators if indicator.lower() in response.lower())
-        
-        # Check for technical terms (simplified)
-        technical_terms = [
-            "algorithm", "methodology", "framework", "architecture",
-            "implementation", "optimization", "evaluation", "analysis",
-            "hypothesis", "validation", "correlation", "distribution"
-        ]
-        
-        technical_count = sum(1 for term in technical_terms if term.lower() in response.lower())
+        # Check for detailed explanations and technical terms (simplified)
+        detail_count = count_keywords(DETAIL_INDICATORS, response_lower)
+        technical_count = count_keywords(TECHNICAL_TERMS, response_lower)
         
         depth_score = min(1.0, (detail_count + technical_count) / 10)
         return depth_score
     
     @staticmethod
-    def _score_accuracy(response: str, task_type: TaskType) -> float:
+    def _score_accuracy(response_lower: str, lines: List[str]) -> float:
         """Score the accuracy (basic check - no hallucination detection)"""
         
         # Basic accuracy checks
         # Check if response is not just repetition
-        lines = response.split('\n')
         unique_lines = set(lines)
         
         if len(unique_lines) < len(lines) * 0.5:
             return 0.3  # Too much repetition
         
         # Check for common filler phrases that indicate uncertainty
-        filler_phrases = [
-            "i don't know", "i'm not sure", "i cannot", "unable to",
-            "no information", "cannot provide", "don't have"
-        ]
-        
-        has_filler = any(phrase in response.lower() for phrase in filler_phrases)
+        has_filler = has_keyword(FILLER_PHRASES, response_lower)
         if has_filler:
             return 0.5
         
         return 0.8  # Default accuracy score
     
     @staticmethod
-    def _score_creativity(response: str, task_type: TaskType) -> float:
-        """Score creativity (especially for idea generation)"""
-        
-        if task_type not in [TaskType.IDEA_GENERATION, TaskType.PROBLEM_SOLVING]:
-            return 0.7  # Neutral score for non-creative tasks
+    def _score_creativity(response_lower: str, tokens: List[str]) -> float:
+        """Score creativity (idea generation and problem solving only)"""
         
         # Check for creative indicators
-        creative_words = [
-            "innovative", "novel", "unique", "creative", "original",
-            "breakthrough", "revolutionary", "pioneering", "cutting-edge",
-            "unprecedented", "groundbreaking", "ingenious"
-        ]
-        
-        creative_count = sum(1 for word in creative_words if word.lower() in response.lower())
+        creative_count = count_keywords(CREATIVE_WORDS, response_lower)
         
         # Check for varied vocabulary
-        words = response.lower().split()
-        unique_words = set(words)
-        vocabulary_diversity = len(unique_words) / len(words) if words else 0
+        vocabulary_diversity = len(set(tokens)) / len(tokens) if tokens else 0
         
         creativity_score = min(1.0, (creative_count / 5) * 0.5 + vocabulary_diversity * 0.5)
         return creativity_score
     
     @staticmethod
-    def _score_coherence(response: str) -> float:
+    def _score_coherence(response_lower: str, paragraphs: List[str]) -> float:
         """Score logical flow and coherence"""
         
         # Check for transition words
-        transitions = [
-            "first", "second", "third", "finally", "however",
-            "therefore", "thus", "moreover", "furthermore",
-            "in addition", "consequently", "as a result",
-            "on the other hand", "in contrast", "similarly"
-        ]
-        
-        transition_count = sum(1 for trans in transitions if trans.lower() in response.lower())
+        transition_count = count_keywords(TRANSITIONS, response_lower)
         
         # Check if ideas flow logically (simplified)
-        paragraphs = response.split('\n\n')
         if len(paragraphs) > 1:
             coherence_score = min(1.0, 0.5 + (transition_count / 8))
         else:
@@ -557,7 +859,7 @@ class ResponseAnalyzer:
         return coherence_score
     
     @staticmethod
-    def _generate_recommendations(scores: Dict[str, float], task_type: TaskType) -> List[str]:
+    def _generate_recommendations(scores: Dict[str, float], profile: TaskProfile, response: str) -> List[str]:
         """Generate specific recommendations based on scores"""
         
         recommendations = []
@@ -580,10 +882,10 @@ class ResponseAnalyzer:
         if scores["coherence"] < 0.6:
             recommendations.append("Improve logical flow with better transitions between ideas")
         
-        if task_type == TaskType.IDEA_GENERATION and scores["creativity"] < 0.6:
+        if profile.wants_creativity_tip and scores["creativity"] < 0.6:
             recommendations.append("Enhance creativity with more innovative and unique ideas")
         
-        if task_type == TaskType.CODE_GENERATION and "```" not in scores:
+        if profile.wants_code_fence and "```" not in response:
             recommendations.append("Use proper code formatting with syntax highlighting")
         
         return recommendations
@@ -598,70 +900,161 @@ async def root():
         "description": "Test and analyze any AI agent's performance",
         "endpoints": {
             "test": "/api/test",
+            "test_stream": "/api/test/stream",
+            "test_batch": "/api/test_batch",
             "results": "/api/results",
             "comparison": "/api/comparison",
             "agents": "/api/agents"
         }
     }
 
-@app.post("/api/test")
-async def test_agent(request: TestRequest):
-    """Test an AI agent with a specific task"""
+async def analyzed_result(
+    request: TestRequest, test_id: str, started_ns: int, agent_response: str, execution_time: float,
+    cached: bool = False
+) -> TestRecord:
+    """Score an agent response and build its test result"""
+    
+    # Analyze the response off the event loop; scoring is CPU-bound
+    analysis = await asyncio.to_thread(
+        ResponseAnalyzer.analyze, agent_response, request.task_type, execution_time
+    )
+    
+    return TestRecord(
+        test_id=test_id,
+        started_ns=started_ns,
+        agent_name=request.agent_name,
+        agent_type=request.agent_type,
+        task_type=request.task_type.value,
+        test_input=request.test_input,
+        success=True,
+        agent_response=agent_response,
+        execution_time=execution_time,
+        analysis=analysis.model_dump(),
+        cached=cached
+    )
+
+def failed_result(request: TestRequest, test_id: str, started_ns: int, error: Exception) -> TestRecord:
+    """Build the test result for an agent call that failed"""
+    return TestRecord(
+        test_id=test_id,
+        started_ns=started_ns,
+        agent_name=request.agent_name,
+        agent_type=request.agent_type,
+        task_type=request.task_type.value,
+        test_input=request.test_input,
+        success=False,
+        error=str(error)
+    )
+
+async def run_test(request: TestRequest) -> TestRecord:
+    """Run one agent test, record it, and return the result (failures included)"""
+    
+    test_id = secrets.token_hex(8)
+    started_ns = time.time_ns()
     
-    test_id = str(uuid.uuid4())
-    start_time = datetime.now()
+    # A cache hit is not a new measurement, so it is returned but kept out of the stats
+    cached = AgentConnector.cached_response(request)
+    if cached is not None:
+        return await analyzed_result(request, test_id, started_ns, cached, 0.0, cached=True)
     
     try:
         # Get response from the external AI agent
         agent_response, execution_time = await AgentConnector.execute_agent(request)
+        test_result = await analyzed_result(request, test_id, started_ns, agent_response, execution_time)
+    except Exception as e:
+        test_result = failed_result(request, test_id, started_ns, e)
+    
+    # Store result
+    platform.add_test_result(test_result)
+    
+    return test_result
+
+@app.post("/api/test")
+async def test_agent(request: TestRequest):
+    """Test an AI agent with a specific task"""
+    
+    test_result = await run_test(request)
+    if not test_result.success:
+        raise HTTPException(status_code=500, detail=test_result.error)
+    
+    return test_result.to_dict()
+
+@app.post("/api/test/stream")
+async def stream_test(request: TestRequest):
+    """Test an AI agent, streaming its output as server-sent events before the final analysis"""
+    
+    test_id = secrets.token_hex(8)
+    started_ns = time.time_ns()
+    
+    async def event_generator():
+        yield {"event": "test", "data": json.dumps({"test_id": test_id})}
+        
+        # A cache hit is not a new measurement, so it is sent but kept out of the stats
+        cached = AgentConnector.cached_response(request)
+        if cached is not None:
+            yield {"data": json.dumps({"text": cached})}
+            test_result = await analyzed_result(request, test_id, started_ns, cached, 0.0, cached=True)
+            yield {"event": "done", "data": json.dumps({
+                "test_id": test_id,
+                "execution_time": test_result.execution_time,
+                "analysis": test_result.analysis,
+                "cached": True
+            })}
+            return
+        
+        chunks = []
+        started = time.time()
+        try:
+            async for chunk in AgentConnector.stream_agent(request):
+                chunks.append(chunk)
+                yield {"data": json.dumps({"text": chunk})}
+            
+            test_result = await analyzed_result(
+                request, test_id, started_ns, "".join(chunks), time.time() - started
+            )
+        except Exception as e:
+            test_result = failed_result(request, test_id, started_ns, e)
+            platform.add_test_result(test_result)
+            yield {"event": "error", "data": json.dumps({"test_id": test_id, "error": test_result.error})}
+            return
         
-        # Analyze the response
-        analysis = ResponseAnalyzer.analyze(agent_response, request.task_type, execution_time)
-        
-        # Prepare test result
-        test_result = {
-            "test_id": test_id,
-            "timestamp": start_time.isoformat(),
-            "agent_name": request.agent_name,
-            "agent_type": request.agent_type,
-            "task_type": request.task_type.value,
-            "test_input": request.test_input,
-            "agent_response": agent_response,
-            "execution_time": execution_time,
-            "analysis": analysis.dict(),
-            "success": True
-        }
-        
-        # Store result
         platform.add_test_result(test_result)
-        
-        return test_result
-        
-    except Exception as e:
-        # Handle errors
-        error_result = {
+        yield {"event": "done", "data": json.dumps({
             "test_id": test_id,
-            "timestamp": start_time.isoformat(),
-            "agent_name": request.agent_name,
-            "task_type": request.task_type.value,
-            "test_input": request.test_input,
-            "error": str(e),
-            "success": False
-        }
-        
-        platform.add_test_result(error_result)
-        
-        raise HTTPException(status_code=500, detail=str(e))
+            "execution_time": test_result.execution_time,
+            "analysis": test_result.analysis
+        })}
+    
+    return EventSourceResponse(event_generator())
+
+@app.post("/api/test_batch")
+async def test_batch(requests: List[TestRequest]):
+    """Test several agents/tasks concurrently; results come back in request order"""
+    
+    # Bound in-flight provider calls so a large batch doesn't trip rate limits
+    sem = asyncio.Semaphore(BATCH_CONCURRENCY)
+    
+    async def run_bounded(request: TestRequest) -> TestRecord:
+        async with sem:
+            return await run_test(request)
+    
+    results = await asyncio.gather(*(run_bounded(r) for r in requests))
+    
+    return {
+        "total": len(results),
+        "successful": sum(1 for r in results if r.success),
+        "results": [r.to_dict() for r in results]
+    }
 
 @app.get("/api/results")
-async def get_results(limit: int = 20):
+async def get_results(limit: int = Query(20, ge=0)):
     """Get recent test results"""
     
-    results = platform.test_results[-limit:]
-    results.reverse()  # Most recent first
+    # Most recent first, without copying or mutating the stored results
+    results = [r.to_dict() for r in islice(reversed(platform.test_results), limit)]
     
     return {
-        "total_tests": len(platform.test_results),
+        "total_tests": platform.global_total,
         "results": results
     }
 
@@ -672,20 +1065,20 @@ async def get_agent_profiles():
     profiles = []
     
     for agent_name, data in platform.agent_profiles.items():
-        avg_score = sum(data["scores"]) / len(data["scores"]) if data["scores"] else 0
+        avg_score = data["score_sum"] / data["score_count"] if data["score_count"] else 0
         
         profile = {
             "agent_name": agent_name,
             "total_tests": data["total_tests"],
             "average_score": round(avg_score, 2),
-            "grade": "A" if avg_score >= 90 else "B" if avg_score >= 80 else "C" if avg_score >= 70 else "D" if avg_score >= 60 else "F",
+            "grade": score_to_grade(avg_score),
             "task_performance": {}
         }
         
-        for task, scores in data["task_performance"].items():
+        for task, count in data["task_count"].items():
             profile["task_performance"][task] = {
-                "tests": len(scores),
-                "average": round(sum(scores) / len(scores), 2) if scores else 0
+                "tests": count,
+                "average": round(data["task_sum"][task] / count, 2)
             }
         
         profiles.append(profile)
@@ -702,16 +1095,16 @@ async def compare_agents():
     comparison = []
     
     for agent_name, data in platform.agent_profiles.items():
-        if data["scores"]:
-            avg_score = sum(data["scores"]) / len(data["scores"])
+        if data["score_count"]:
+            avg_score = data["score_sum"] / data["score_count"]
             
             comparison.append({
                 "agent_name": agent_name,
                 "total_tests": data["total_tests"],
                 "average_score": round(avg_score, 2),
-                "best_score": round(max(data["scores"]), 2),
-                "worst_score": round(min(data["scores"]), 2),
-                "consistency": round(100 - (max(data["scores"]) - min(data["scores"])), 2)
+                "best_score": round(data["best_score"], 2),
+                "worst_score": round(data["worst_score"], 2),
+                "consistency": round(100 - (data["best_score"] - data["worst_score"]), 2)
             })
     
     comparison.sort(key=lambda x: x["average_score"], reverse=True)
@@ -726,13 +1119,9 @@ async def compare_agents():
 async def get_metrics():
     """Get platform statistics"""
     
-    total_tests = len(platform.test_results)
-    successful_tests = len([r for r in platform.test_results if r.get("success")])
-    
-    task_distribution = {}
-    for result in platform.test_results:
-        task = result.get("task_type", "unknown")
-        task_distribution[task] = task_distribution.get(task, 0) + 1
+    total_tests = platform.global_total
+    successful_tests = platform.global_success
+    task_distribution = dict(platform.task_counts)
     
     return {
         "total_tests": total_tests,
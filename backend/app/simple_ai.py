@@ -32,33 +32,399 @@
 
 
 
-from huggingface_hub import InferenceClient
+import os
+import re
+import json
+import types
+import asyncio
+import logging
+import threading
+from functools import lru_cache
 
-# Your API Key
-HF_API_KEY = "api_key_here"
+import orjson
+from dotenv import load_dotenv
+from huggingface_hub import InferenceClient, AsyncInferenceClient, InferenceTimeoutError, constants
+from huggingface_hub.utils import HfHubHTTPError, get_session
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential_jitter
 
-# Initialize client
-client = InferenceClient(token=HF_API_KEY)
+# Faster event loop for the batch fan-out; ships with uvicorn[standard], unavailable on Windows
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
 
-def get_ai_response(prompt, model_name):
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Your API Key, read once from the environment or .env
+HF_API_KEY = os.getenv("HF_TOKEN")
+if not HF_API_KEY:
+    logger.warning("HF_TOKEN is not set; Hugging Face calls will be unauthenticated")
+
+# Seconds to wait on a model before giving up
+HF_TIMEOUT = 60
+
+# Context window assumed when a tokenizer doesn't report a usable one
+HF_CONTEXT_WINDOW = int(os.getenv("HF_CONTEXT_WINDOW", "8192"))
+
+# Prompts shorter than this many characters can't overflow the window, so skip tokenizing them
+TRUNCATE_CHECK_CHARS = 4000
+
+# HTTP statuses worth retrying: rate limiting, model loading and gateway hiccups
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+def _is_transient(error):
+    if isinstance(error, InferenceTimeoutError):
+        return True
+    response = getattr(error, "response", None)
+    return isinstance(error, HfHubHTTPError) and response is not None and response.status_code in RETRYABLE_STATUS
+
+# Retry transient failures with jittered backoff; anything else (or the last failure) is re-raised as is
+_retry_transient = retry(
+    retry=retry_if_exception(_is_transient),
+    stop=stop_after_attempt(4),
+    wait=wait_exponential_jitter(initial=0.2, max=4),
+    reraise=True
+)
+
+# Fixed instructions that open every batched prompt
+BATCH_PROMPT_HEADER = (
+    "Answer each numbered question separately. "
+    "Start each answer on a new line with its number in square brackets.\n"
+)
+
+# An "[n]" answer marker at the start of a line in a batched reply
+_ANSWER_SPLIT_RE = re.compile(r"(?m)^\[(\d+)\]\s*")
+
+# Initialize clients once; each keeps its HTTP session open so calls reuse pooled connections
+async_client = AsyncInferenceClient(token=HF_API_KEY, timeout=HF_TIMEOUT)
+
+def _use_orjson():
+    # huggingface_hub parses every response with stdlib json.loads; point its parsing modules at orjson instead
+    shim = types.ModuleType("json")
+    shim.__dict__.update(json.__dict__)
+    shim.loads = orjson.loads
+    try:
+        from huggingface_hub.inference import _common
+        from huggingface_hub.inference._generated.types import base
+    except ImportError:
+        return
+    for module in (_common, base):
+        if getattr(module, "json", None) is json:
+            module.json = shim
+
+_use_orjson()
+
+# Hosts the inference clients talk to
+_PREWARM_URLS = (constants.INFERENCE_ENDPOINT, "https://router.huggingface.co")
+
+def _prewarm():
+    # The sync clients share huggingface_hub's session, so these connections stay pooled for them
+    session = get_session()
+    for url in _PREWARM_URLS:
+        try:
+            session.head(url, timeout=5)
+        except Exception as e:
+            logger.debug("Pre-warming %s failed: %s", url, e)
+
+# Open TCP+TLS in the background so the first real request doesn't pay the handshake
+if os.getenv("HF_PREWARM", "true").lower() != "false":
+    threading.Thread(target=_prewarm, name="hf-prewarm", daemon=True).start()
+
+class SemanticCache:
+    """
+    In-process cache that answers a prompt with the response to an earlier prompt of similar meaning
+    Needs sentence-transformers; disables itself if it is not installed
+    """
+    
+    def __init__(self, enabled, threshold, embedding_model, max_entries=10000):
+        self.enabled = enabled
+        self.threshold = threshold
+        self.embedding_model = embedding_model
+        self.max_entries = max_entries
+        self._encoder = None
+        # (model name, system prompt) -> (normalized embedding matrix, responses in the same row order)
+        self._stores = {}
+    
+    def get(self, prompt, model_name, system=None):
+        store = self._stores.get((model_name, system))
+        if store is None:
+            return None
+        vector = self._embed(prompt)
+        if vector is None:
+            return None
+        
+        # Rows are unit vectors, so the dot product is the cosine similarity
+        vectors, responses = store
+        similarities = vectors @ vector
+        best = int(similarities.argmax())
+        if similarities[best] < self.threshold:
+            return None
+        return responses[best]
+    
+    def set(self, prompt, model_name, response, system=None):
+        vector = self._embed(prompt)
+        if vector is None:
+            return
+        
+        import numpy as np
+        vectors, responses = self._stores.get((model_name, system), (np.empty((0, vector.shape[0]), dtype=np.float32), []))
+        # Drop the oldest entry once full
+        if len(responses) >= self.max_entries:
+            vectors, responses = vectors[1:], responses[1:]
+        self._stores[(model_name, system)] = (np.vstack([vectors, vector]), responses + [response])
+    
+    def _embed(self, prompt):
+        # A cache problem is only ever a miss; it must not fail the request
+        if self._encoder is None:
+            try:
+                from sentence_transformers import SentenceTransformer
+                self._encoder = SentenceTransformer(self.embedding_model)
+            except ImportError:
+                logger.warning("sentence-transformers not installed, disabling semantic cache")
+                self.enabled = False
+                return None
+            except Exception as e:
+                logger.warning("Failed to load %s, disabling semantic cache: %s", self.embedding_model, e)
+                self.enabled = False
+                return None
+        try:
+            return self._encoder.encode(prompt, normalize_embeddings=True).astype("float32")
+        except Exception as e:
+            logger.warning("Semantic cache embedding failed, skipping: %s", e)
+            return None
+
+# Off by default; uses the same settings as the backend's LLM cache
+semantic_cache = SemanticCache(
+    enabled=os.getenv("LLM_SEMANTIC_CACHE", "false").lower() == "true",
+    threshold=float(os.getenv("LLM_SEMANTIC_THRESHOLD", "0.92")),
+    embedding_model=os.getenv("LLM_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+)
+
+def get_ai_response(prompt, model_name, temperature=0.7, system=None):
     """
     Get response from Hugging Face model
+    Plain prompts use text generation; pass system to go through the chat template instead
+    Pass a list of prompts to send them concurrently and get a list of responses back
+    Responses at temperature 0 are deterministic, so those are cached
+    With the semantic cache on, near-duplicate prompts reuse an earlier response
     """
+    if isinstance(prompt, list):
+        return _run(_get_ai_responses_once(prompt, model_name, temperature, system))
+    
     try:
-        messages = [{"role": "user", "content": prompt}]
+        prompt = _fit_prompt(prompt, model_name, 500)
         
-        response = client.chat_completion(
-            model=model_name,
-            messages=messages,
-            max_tokens=500,
-            temperature=0.7
-        )
+        if semantic_cache.enabled:
+            cached = semantic_cache.get(prompt, model_name, system)
+            if cached is not None:
+                return cached
+        
+        if temperature == 0:
+            response = _cached_completion(prompt, model_name, 500, system)
+        else:
+            response = _completion(prompt, model_name, temperature, 500, system)
         
-        return response.choices[0].message.content
+        if semantic_cache.enabled:
+            semantic_cache.set(prompt, model_name, response, system)
+        return response
     
     except Exception as e:
         return f"Error: {str(e)}"
 
+# One client per model, bound at construction so calls skip per-request model resolution
+@lru_cache(maxsize=8)
+def _client_for(model_name):
+    return InferenceClient(model=model_name, token=HF_API_KEY, timeout=HF_TIMEOUT)
+
+@_retry_transient
+def _completion(prompt, model_name, temperature, max_tokens, system=None):
+    # Single-turn with no system prompt: skip the server-side chat template
+    if system is None:
+        return _client_for(model_name).text_generation(
+            prompt,
+            max_new_tokens=max_tokens,
+            # Text generation rejects temperature 0; greedy decoding is the equivalent
+            temperature=temperature or None,
+            do_sample=temperature > 0,
+            return_full_text=False
+        )
+    
+    messages = [
+        {"role": "system", "content": system},
+        {"role": "user", "content": prompt}
+    ]
+    
+    response = _client_for(model_name).chat_completion(
+        messages=messages,
+        max_tokens=max_tokens,
+        temperature=temperature
+    )
+    
+    return response.choices[0].message.content
+
+@lru_cache(maxsize=8)
+def _tokenizer_for(model_name):
+    # Optional: without transformers (or access to the tokenizer) prompts are sent as is
+    try:
+        from transformers import AutoTokenizer
+        return AutoTokenizer.from_pretrained(model_name, token=HF_API_KEY)
+    except Exception as e:
+        logger.warning("No local tokenizer for %s, prompts won't be truncated: %s", model_name, e)
+        return None
+
+def _fit_prompt(prompt, model_name, max_tokens):
+    """
+    Trim the prompt so prompt plus completion fit the model's context window
+    """
+    if len(prompt) <= TRUNCATE_CHECK_CHARS:
+        return prompt
+    tokenizer = _tokenizer_for(model_name)
+    if tokenizer is None:
+        return prompt
+    
+    context = min(tokenizer.model_max_length, HF_CONTEXT_WINDOW)
+    ids = tokenizer.encode(prompt, add_special_tokens=False)
+    budget = context - max_tokens
+    if len(ids) <= budget:
+        return prompt
+    return tokenizer.decode(ids[:budget])
+
+# Failed calls raise, so only real responses are ever cached
+@lru_cache(maxsize=4096)
+def _cached_completion(prompt, model_name, max_tokens, system):
+    return _completion(prompt, model_name, 0, max_tokens, system)
+
+def stream_ai_response(prompt, model_name, temperature=0.7):
+    """
+    Yield the response from Hugging Face model piece by piece as it is generated
+    """
+    try:
+        messages = [{"role": "user", "content": _fit_prompt(prompt, model_name, 500)}]
+        
+        for chunk in _client_for(model_name).chat_completion(
+            messages=messages,
+            max_tokens=500,
+            temperature=temperature,
+            stream=True
+        ):
+            text = chunk.choices[0].delta.content
+            if text:
+                yield text
+    
+    except Exception as e:
+        yield f"Error: {str(e)}"
+
+def get_ai_responses_batched(prompts, model_name, batch_size=8):
+    """
+    Get responses for many short prompts, packing up to batch_size of them into each model call
+    Falls back to one call per prompt when the model doesn't answer every numbered question
+    """
+    responses = []
+    for start in range(0, len(prompts), batch_size):
+        batch = prompts[start:start + batch_size]
+        answers = None
+        try:
+            answers = _parse_numbered_answers(
+                _completion(_numbered_prompt(batch), model_name, 0.7, 500 * len(batch)),
+                len(batch)
+            )
+        except Exception as e:
+            logger.warning("Batched call failed, falling back to one call per prompt: %s", e)
+        if answers is None:
+            answers = [get_ai_response(prompt, model_name) for prompt in batch]
+        responses.extend(answers)
+    return responses
+
+def _numbered_prompt(prompts):
+    return BATCH_PROMPT_HEADER + "\n".join(
+        f"[{i}] {prompt}" for i, prompt in enumerate(prompts, 1)
+    )
+
+def _parse_numbered_answers(text, count):
+    # Markers must run 1..count in order; any other "[n]" line stays part of the answer text
+    markers = []
+    for match in _ANSWER_SPLIT_RE.finditer(text):
+        if int(match.group(1)) == len(markers) + 1:
+            markers.append(match)
+            if len(markers) == count:
+                break
+    if len(markers) < count:
+        return None
+    ends = [match.start() for match in markers[1:]] + [len(text)]
+    return [text[match.end():end].strip() for match, end in zip(markers, ends)]
+
+async def get_ai_responses(prompts, model_name, temperature=0.7, system=None):
+    """
+    Get responses for several prompts concurrently, from inside a running event loop
+    """
+    return await _gather_responses(async_client, prompts, model_name, temperature, system)
+
+async def close():
+    """
+    Close the shared async client's connections (call once at app shutdown)
+    """
+    await async_client.close()
+
+def _run(coro):
+    # Like asyncio.run, but on a uvloop loop when uvloop is installed
+    if uvloop is None:
+        return asyncio.run(coro)
+    loop = uvloop.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
+
+async def _get_ai_responses_once(prompts, model_name, temperature, system):
+    # asyncio.run starts a fresh loop, so use a client that lives and dies with it
+    async with AsyncInferenceClient(token=HF_API_KEY, timeout=HF_TIMEOUT) as aclient:
+        return await _gather_responses(aclient, prompts, model_name, temperature, system)
+
+@_retry_transient
+async def _achat(aclient, prompt, model_name, temperature=0.7, system=None):
+    messages = [{"role": "user", "content": prompt}]
+    if system is not None:
+        messages.insert(0, {"role": "system", "content": system})
+    
+    return await aclient.chat_completion(
+        model=model_name,
+        messages=messages,
+        max_tokens=500,
+        temperature=temperature
+    )
+
+# (client, model, prompt, temperature, system) -> call currently in flight for it
+_inflight = {}
+
+async def _achat_shared(aclient, prompt, model_name, temperature=0.7, system=None):
+    # Concurrent identical requests on the same client share one model call
+    key = (aclient, model_name, prompt, temperature, system)
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_achat(aclient, prompt, model_name, temperature, system))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    # Shielded so one cancelled caller doesn't cancel the call for everyone else
+    return await asyncio.shield(task)
+
+async def _gather_responses(aclient, prompts, model_name, temperature=0.7, system=None):
+    results = await asyncio.gather(
+        *(
+            _achat_shared(aclient, _fit_prompt(prompt, model_name, 500), model_name, temperature, system)
+            for prompt in prompts
+        ),
+        return_exceptions=True
+    )
+    
+    # A failed prompt yields an error string, same as the single-prompt path
+    return [
+        f"Error: {str(r)}" if isinstance(r, Exception) else r.choices[0].message.content
+        for r in results
+    ]
+
 # Test it
 if __name__ == "__main__":
     prompt = "What is artificial intelligence?"
@@ -66,4 +432,9 @@ if __name__ == "__main__":
     
     print(f"Testing: {model}")
     print(f"Prompt: {prompt}")
-    print(f"Response: {get_ai_response(prompt, model)}")
\ No newline at end of file
+    print(f"Response: {get_ai_response(prompt, model)}")
+    
+    print("Streamed: ", end="", flush=True)
+    for text in stream_ai_response(prompt, model):
+        print(text, end="", flush=True)
+    print()
\ No newline at end of file
@@ -0,0 +1,6 @@
+import os
+
+# Modules read these at import; keep tests offline and free of real credentials
+os.environ.setdefault("GOOGLE_API_KEY", "test")
+os.environ.setdefault("HF_TOKEN", "test")
+os.environ.setdefault("HF_PREWARM", "false")
@@ -0,0 +1,71 @@
+import asyncio
+import types
+
+import pytest
+
+from app.api import experiments
+from app.api.experiments import summarize_tests
+
+
+def test_summarize_tests_counts_successes_and_averages_quality():
+    results = [
+        {"status": "completed", "metrics": {"quality_score": 0.8}},
+        {"status": "failed", "metrics": {}},
+        None,
+        {"status": "completed", "metrics": {"quality_score": 0.4}},
+    ]
+    assert summarize_tests(results) == {
+        "total_tests": 4,
+        "successful_tests": 2,
+        "success_rate": 0.5,
+        "average_quality_score": pytest.approx(0.3),
+    }
+
+
+def test_summarize_tests_empty():
+    assert summarize_tests([]) == {}
+
+
+class _FakeSession:
+    def __init__(self, experiment, fail):
+        self.experiment = experiment
+        self.fail = fail
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def run_sync(self, fn):
+        if self.fail:
+            raise RuntimeError("database is down")
+
+    async def get(self, model, key):
+        return self.experiment
+
+    async def execute(self, statement):
+        return types.SimpleNamespace(scalar_one_or_none=lambda: self.experiment)
+
+    async def commit(self):
+        pass
+
+
+def test_failed_save_marks_experiment_failed(monkeypatch):
+    experiment = types.SimpleNamespace(status="running", completed_at=None)
+    sessions = iter([_FakeSession(experiment, fail=True), _FakeSession(experiment, fail=False)])
+    monkeypatch.setattr(experiments, "SessionLocal", lambda: next(sessions))
+
+    asyncio.run(experiments.execute_experiment(1, 1, [], [], {}))
+    assert experiment.status == "failed"
+    assert experiment.completed_at is not None
+
+
+def test_saved_experiment_gets_summary_of_all_stored_tests(monkeypatch):
+    earlier_run = types.SimpleNamespace(result={"status": "completed", "metrics": {"quality_score": 1.0}})
+    experiment = types.SimpleNamespace(status="running", completed_at=None, results=None, agent_tests=[earlier_run])
+    monkeypatch.setattr(experiments, "SessionLocal", lambda: _FakeSession(experiment, fail=False))
+
+    asyncio.run(experiments.execute_experiment(1, 1, [], [], {}))
+    assert experiment.status == "completed"
+    assert experiment.results == summarize_tests([earlier_run.result])
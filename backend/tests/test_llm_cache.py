@@ -0,0 +1,30 @@
+import asyncio
+
+from app.core.llm_cache import LLMCache
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def setex(self, key, ttl, value):
+        self.data[key] = value.encode()
+
+
+class _BrokenEncoder:
+    def encode(self, text, normalize_embeddings=True):
+        raise RuntimeError("encoder crashed")
+
+
+def test_embedding_failure_falls_through_to_a_miss():
+    cache = LLMCache(_FakeRedis(), semantic=True)
+    cache._encoder = _BrokenEncoder()
+
+    async def scenario():
+        await cache.store("model", "prompt", 0.7, "response")
+        return await cache.lookup("model", "other prompt", 0.7), await cache.lookup("model", "prompt", 0.7)
+
+    assert asyncio.run(scenario()) == (None, "response")
@@ -0,0 +1,86 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app import main
+
+
+def _request(**overrides):
+    fields = dict(
+        agent_name="agent",
+        agent_endpoint="https://example.com/v1",
+        agent_type="openai",
+        task_type="summarization",
+        test_input="topic",
+    )
+    fields.update(overrides)
+    return main.TestRequest(**fields)
+
+
+def test_response_cache_key_ignores_prompt_whitespace():
+    request = _request()
+    assert main.ResponseCache.key(request, "Summarize  this\n") == main.ResponseCache.key(request, "Summarize this")
+
+
+def test_response_cache_key_separates_api_keys():
+    prompt = "Summarize this"
+    keys = {
+        main.ResponseCache.key(_request(agent_api_key=api_key), prompt)
+        for api_key in (None, "key-a", "key-b")
+    }
+    assert len(keys) == 3
+
+
+def test_response_cache_key_separates_endpoints_and_tasks():
+    prompt = "Summarize this"
+    base = main.ResponseCache.key(_request(), prompt)
+    assert main.ResponseCache.key(_request(agent_endpoint="https://other.example.com"), prompt) != base
+    assert main.ResponseCache.key(_request(task_type="code_generation"), prompt) != base
+
+
+def test_get_results_rejects_negative_limit():
+    with TestClient(main.app) as client:
+        assert client.get("/api/results", params={"limit": -1}).status_code == 422
+        assert client.get("/api/results", params={"limit": 0}).json()["results"] == []
+
+
+def test_response_cache_evicts_oldest_entry():
+    cache = main.ResponseCache(maxsize=2, ttl=60)
+    for key in ("a", "b", "c"):
+        cache.set(key, key.upper())
+    assert cache.get("a") is None
+    assert (cache.get("b"), cache.get("c")) == ("B", "C")
+
+
+def test_response_cache_size_zero_disables_caching():
+    cache = main.ResponseCache(maxsize=0, ttl=60)
+    cache.set("a", "A")
+    assert cache.get("a") is None
+
+
+def test_cache_hits_are_returned_but_not_recorded(monkeypatch):
+    request = _request(test_input="cache hit")
+    prompt = main.AgentConnector._create_prompt(request.task_type, request.test_input)
+    monkeypatch.setattr(main, "response_cache", main.ResponseCache(maxsize=10, ttl=60))
+    monkeypatch.setattr(main, "platform", main.TestingPlatform())
+    main.response_cache.set(main.ResponseCache.key(request, prompt), "A cached summary.")
+
+    result = asyncio.run(main.run_test(request))
+    assert result.success and result.cached
+    assert result.agent_response == "A cached summary."
+    assert main.platform.global_total == 0
+    assert main.platform.agent_profiles == {}
+
+
+def test_fresh_calls_are_recorded(monkeypatch):
+    async def execute_agent(request):
+        return "A fresh summary.", 1.5
+
+    monkeypatch.setattr(main, "response_cache", main.ResponseCache(maxsize=10, ttl=60))
+    monkeypatch.setattr(main, "platform", main.TestingPlatform())
+    monkeypatch.setattr(main.AgentConnector, "execute_agent", staticmethod(execute_agent))
+
+    result = asyncio.run(main.run_test(_request(test_input="fresh")))
+    assert result.success and not result.cached
+    assert main.platform.global_total == 1
+    assert main.platform.agent_profiles["agent"]["total_tests"] == 1
@@ -0,0 +1,28 @@
+import asyncio
+
+import pytest
+
+from app.agents.research_agent import ResearchAgent
+
+
+@pytest.fixture
+def agent():
+    return ResearchAgent(agent_type="gemini", task_type="paper_writing_batch")
+
+
+@pytest.mark.parametrize("sections", [[], "Introduction", ["Introduction", 3], None])
+def test_paper_writing_batch_rejects_bad_sections(agent, sections):
+    task = {"id": "t1", "type": "paper_writing_batch", "parameters": {"sections": sections, "content": "x"}}
+    result = asyncio.run(agent.execute_task(task))
+    assert result["status"] == "failed"
+    assert "non-empty list of strings" in result["error"]
+
+
+@pytest.mark.parametrize("word_count, expected", [
+    (0, 0.3), (99, 0.3),
+    (100, 0.6), (299, 0.6),
+    (300, 0.8), (499, 0.8),
+    (500, 0.95), (10_000, 0.95),
+])
+def test_completeness_grades_match_word_count_thresholds(agent, word_count, expected):
+    assert agent._assess_completeness(word_count) == expected
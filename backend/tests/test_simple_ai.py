@@ -0,0 +1,107 @@
+import asyncio
+import types
+
+import numpy as np
+
+from app.simple_ai import SemanticCache, _gather_responses, _inflight, _numbered_prompt, _parse_numbered_answers
+
+
+def test_parse_numbered_answers_splits_in_order():
+    text = "[1] Yes.\n[2] Paris.\n[3] 42"
+    assert _parse_numbered_answers(text, 3) == ["Yes.", "Paris.", "42"]
+
+
+def test_parse_numbered_answers_ignores_inline_citations():
+    text = "[1] As shown in [2], yes.\n[2] Paris."
+    assert _parse_numbered_answers(text, 2) == ["As shown in [2], yes.", "Paris."]
+
+
+def test_parse_numbered_answers_keeps_out_of_order_markers_as_text():
+    text = "[1] Sources:\n[3] Smith 2020\n[2] Paris."
+    assert _parse_numbered_answers(text, 2) == ["Sources:\n[3] Smith 2020", "Paris."]
+
+
+def test_parse_numbered_answers_rejects_missing_answer():
+    assert _parse_numbered_answers("[1] Yes.\n[3] 42", 3) is None
+    assert _parse_numbered_answers("Sorry, I can't help with that.", 1) is None
+
+
+def test_numbered_prompt_round_trips():
+    prompt = _numbered_prompt(["a?", "b?"])
+    assert prompt.endswith("[1] a?\n[2] b?")
+    assert "[1]" not in prompt.splitlines()[0]
+
+
+class _FakeAsyncClient:
+    def __init__(self):
+        self.calls = []
+
+    async def chat_completion(self, **kwargs):
+        self.calls.append(kwargs)
+        await asyncio.sleep(0.01)
+        content = kwargs["messages"][-1]["content"].upper()
+        return types.SimpleNamespace(
+            choices=[types.SimpleNamespace(message=types.SimpleNamespace(content=content))]
+        )
+
+
+def test_concurrent_identical_prompts_share_one_call():
+    client = _FakeAsyncClient()
+    responses = asyncio.run(_gather_responses(client, ["a", "b", "a", "a"], "model"))
+    assert responses == ["A", "B", "A", "A"]
+    assert sorted(call["messages"][-1]["content"] for call in client.calls) == ["a", "b"]
+    assert _inflight == {}
+
+
+def test_different_temperatures_are_not_shared():
+    client = _FakeAsyncClient()
+
+    async def scenario():
+        return await asyncio.gather(
+            _gather_responses(client, ["a"], "model", 0.7),
+            _gather_responses(client, ["a"], "model", 0.0),
+        )
+
+    asyncio.run(scenario())
+    assert sorted(call["temperature"] for call in client.calls) == [0.0, 0.7]
+
+
+class _FakeEncoder:
+    def encode(self, text, normalize_embeddings=True):
+        return np.array([1.0, 0.0] if "capital" in text else [0.0, 1.0])
+
+
+def _semantic_cache():
+    cache = SemanticCache(enabled=True, threshold=0.9, embedding_model="fake")
+    cache._encoder = _FakeEncoder()
+    return cache
+
+
+def test_semantic_cache_matches_similar_prompts():
+    cache = _semantic_cache()
+    cache.set("What is the capital of France?", "model", "Paris")
+    assert cache.get("Name the capital of France", "model") == "Paris"
+    assert cache.get("Tell me a joke", "model") is None
+    assert cache.get("What is the capital of France?", "other-model") is None
+
+
+def test_semantic_cache_separates_system_prompts():
+    cache = _semantic_cache()
+    cache.set("What is the capital of France?", "model", "Paris")
+    assert cache.get("What is the capital of France?", "model", system="Reply only in French") is None
+    cache.set("What is the capital of France?", "model", "C'est Paris", system="Reply only in French")
+    assert cache.get("What is the capital of France?", "model", system="Reply only in French") == "C'est Paris"
+    assert cache.get("What is the capital of France?", "model") == "Paris"
+
+
+def test_semantic_cache_encode_failure_is_a_miss():
+    cache = _semantic_cache()
+    cache.set("What is the capital of France?", "model", "Paris")
+
+    class Broken:
+        def encode(self, text, normalize_embeddings=True):
+            raise RuntimeError("CUDA out of memory")
+
+    cache._encoder = Broken()
+    assert cache.get("What is the capital of France?", "model") is None
+    cache.set("Another prompt", "model", "ignored")
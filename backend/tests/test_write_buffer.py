@@ -0,0 +1,45 @@
+import asyncio
+
+from app.db.write_buffer import WriteBuffer
+
+
+def _buffer(**kwargs):
+    buffer = WriteBuffer(**kwargs)
+    written = []
+
+    async def write(batch):
+        written.append(list(batch))
+
+    buffer._write = write
+    return buffer, written
+
+
+def test_stop_flushes_partial_batch():
+    async def scenario():
+        buffer, written = _buffer(max_batch=50, max_delay=10)
+        for i in range(3):
+            await buffer.put(i)
+        await asyncio.sleep(0)  # let the flusher start collecting
+        await buffer.stop()
+        return written
+
+    assert asyncio.run(scenario()) == [[0, 1, 2]]
+
+
+def test_batches_split_at_max_batch():
+    async def scenario():
+        buffer, written = _buffer(max_batch=2, max_delay=10)
+        for i in range(5):
+            await buffer.put(i)
+        await buffer.stop()
+        return written
+
+    written = asyncio.run(scenario())
+    assert [record for batch in written for record in batch] == [0, 1, 2, 3, 4]
+    assert all(len(batch) <= 2 for batch in written)
+
+
+def test_stop_without_start_is_a_no_op():
+    buffer, written = _buffer()
+    asyncio.run(buffer.stop())
+    assert written == []